@@ -182,7 +182,8 @@
  ^{:tag Boolean
    :doc "Returns true if x is nil, false otherwise."
    :added "1.0"
-   :static true}
+   :static true
+   :inline (fn nil?__inliner [x] (list 'is? x nil))}
  nil? (fn nil? [x] (is? x nil)))
 
 (def
@@ -326,7 +327,7 @@
                       (cons
                         ifn
                         (cons (clojure.lang.symbol/Symbol
-                                (.concat (.getName name) "__inliner"))
+                                (py.bytecode/BINARY_ADD (.getName name) "__inliner"))
                               (next inline))))
                     m))
               m (conj (py/if (meta name) (meta name) {}) m)]
@@ -357,25 +358,88 @@
       nil
       (clojure.lang.persistentvector/vec coll))))
 
+;;; transients
+
+(defn transient
+  "Alpha - subject to change.
+  Returns a new, transient version of the collection, in constant time."
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.asTransient coll))
+
+(defn persistent!
+  "Alpha - subject to change.
+  Returns a new, persistent version of the transient collection, in
+  constant time. The transient collection cannot be used after this
+  call, any such use will throw an exception."
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.persistent coll))
+
+(defn conj!
+  "Alpha - subject to change.
+  Adds x to the transient collection, and return coll. The 'addition'
+  may happen at different 'places' depending on the concrete type."
+  {:added "1.1"
+   :static true}
+  [coll x]
+  (.conj coll x))
+
+(defn assoc!
+  "Alpha - subject to change.
+  When applied to a transient map, adds mapping of key(s) to
+  val(s). When applied to a transient vector, sets the val at index.
+  Note - index must be <= (count vector). Returns coll."
+  {:added "1.1"
+   :static true}
+  ([coll key val] (.assoc coll key val))
+  ([coll key val & kvs]
+   (loop [ret (.assoc coll key val) kvs kvs]
+     (py/if kvs
+       (recur (.assoc ret (first kvs) (second kvs)) (nnext kvs))
+       ret))))
+
+(defn pop!
+  "Alpha - subject to change.
+  Removes the last item from a transient vector. If
+  the collection is empty, throws an exception. Returns coll"
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.pop coll))
+
+(defn dissoc!
+  "Alpha - subject to change.
+  Returns a transient map that doesn't contain a mapping for key(s)."
+  {:added "1.1"
+   :static true}
+  ([map key] (.without map key))
+  ([map key & ks]
+   (loop [ret (.without map key) ks ks]
+     (py/if ks
+       (recur (.without ret (first ks)) (next ks))
+       ret))))
+
 (defn hash-map
   "keyval => key val
   Returns a new hash map with supplied mappings."
   {:added "1.0"}
   ([] {})
   ([& keyvals]
-    (let [coll {}]
-      (loop [keyvals (seq keyvals) coll coll]
-        (py/if (nil? keyvals)
-          coll
-          (do
-            (py/if (py.bytecode/COMPARE_OP "==" (py/len keyvals) 1)
-              (throw (py/Exception "Even number of args required to hash-map")))
-            (py/if (py.bytecode/COMPARE_OP "in" (first keyvals) coll)
+    (loop [keyvals (seq keyvals) coll (transient {})]
+      (py/if (nil? keyvals)
+        (persistent! coll)
+        (do
+          (py/if (nil? (next keyvals))
+            (throw (py/Exception "Even number of args required to hash-map")))
+          (let [n (py/len coll)
+                c (assoc! coll (first keyvals) (fnext keyvals))]
+            ;; the count only stays the same for a key already there
+            (py/if (py.bytecode/COMPARE_OP "==" (py/len c) n)
               (throw (py/Exception "Duplicate keys found in hash-map")))
-            (recur (nnext keyvals)
-              (.assoc coll
-                (first keyvals)
-                (fnext keyvals)))))))))
+            (recur (nnext keyvals) c)))))))
 
 (def
  ^{:arglists '([& items])
@@ -509,7 +573,9 @@
   except it also works for nil, and compares numbers and collections in a
   type-independent manner.  Clojure's immutable data structures define equals()
   (and thus =) as a value, not an identity, comparison."
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP "==" x y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "==" x y))
   ([x y & more]
@@ -601,7 +667,8 @@
 
 (defn identical?
   "Tests if 2 arguments are the same object"
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP "is" x y))}
   ([x y] (py.bytecode/COMPARE_OP "is" x y)))
 
 ;;; private defs
@@ -702,7 +769,8 @@
   "Returns a number one greater than num. Does not auto-promote longs, will
   throw on overflow. See also: inc'"
   {:added "1.2"
-   :static true}
+   :static true
+   :inline (fn [x] (list 'py.bytecode/BINARY_ADD x 1))}
   [x] (py.bytecode/BINARY_ADD x 1))
 
 (defmacro lazy-seq
@@ -837,38 +905,9 @@
     Seqable
     generic-interator-fn)
 
-(definterface IChunkedSeq []
-  clojure.lang.sequential/Sequential
-  clojure.lang.iseq/ISeq
-  (chunkedFirst [self] nil)
-  (chunkedNext [self] nil)
-  (chunkedMore [self] nil))
-
-(deftype ArrayChunk [array off end]
-  (__getitem__
-    ([self i]
-      (py.bytecode/BINARY_SUBSCR array (py.bytecode/BINARY_ADD off i)))
-    ([self i not-found]
-      (if (py.bytecode/COMPARE_OP ">=" i 0)
-        (if (py.bytecode/COMPARE_OP "<" i (py/len self))
-          (py.bytecode/BINARY_SUBSCR array i)
-          not-found)
-        not-found)))
-  (__len__ [self]
-    (py.bytecode/BINARY_SUBTRACT end off))
-  (nth [self & args]
-    (apply (.-__getitem__ self) args))
-  (dropFirst [self]
-    (if (= off end)
-      (throw (IllegalStateException "dropFirst of empty chunk")))
-    (ArrayChunk array (inc off) end))
-  (reduce [self f start]
-    (loop [ret (f start (py.bytecode/BINARY_SUBSCR array off))
-         x (inc off)]
-       (if (py.bytecode/COMPARE_OP "<" x end)
-       (recur (f ret (py.bytecode/BINARY_SUBSCR array x))
-        (inc x))
-       ret))))
+(def IChunkedSeq clojure.lang.ichunkedseq/IChunkedSeq)
+
+(def ArrayChunk clojure.lang.arraychunk/ArrayChunk)
 
 (deftype ChunkBuffer [buffer end]
   (add [self o]
@@ -910,6 +949,9 @@
       '()
       _more)))
 
+; ChunkedCons came after the ISeq protocol fns were extended above
+(clojure.lang.protocol/extendForAllSubclasses clojure.lang.iseq/ISeq)
+
 (defn chunk-buffer [capacity]
   (ChunkBuffer (py.bytecode/BINARY_MULTIPLY (py/list [nil]) capacity) 0))
 
@@ -1027,7 +1069,9 @@
 (defn +
   "Returns the sum of nums. (+) returns 0. Does not auto-promote longs, will
   throw on overflow. See also: +'"
-  {:added "1.2"}
+  {:added "1.2"
+   :inline (fn [x y] (list 'py.bytecode/BINARY_ADD x y))
+   :inline-arities #{2}}
   ([] 0)
   ([x] x)
   ([x y] (py.bytecode/BINARY_ADD x y))
@@ -1037,7 +1081,9 @@
 (defn *
   "Returns the product of nums. (*) returns 1. Does not auto-promote longs,
   will throw on overflow. See also: *'"
-  {:added "1.2"}
+  {:added "1.2"
+   :inline (fn [x y] (list 'py.bytecode/BINARY_MULTIPLY x y))
+   :inline-arities #{2}}
   ([] 1)
   ([x] x)
   ([x y] (py.bytecode/BINARY_MULTIPLY x y))
@@ -1057,7 +1103,10 @@
   "If no ys are supplied, returns the negation of x, else subtracts the ys from
   x and returns the result. Does not auto-promote longs, will throw on
   overflow. See also: -'"
-  {:added "1.2"}
+  {:added "1.2"
+   :inline (fn ([x] (list 'py.bytecode/UNARY_NEGATIVE x))
+               ([x y] (list 'py.bytecode/BINARY_SUBTRACT x y)))
+   :inline-arities #{1 2}}
   ([x] (py.bytecode/UNARY_NEGATIVE x))
   ([x y] (py.bytecode/BINARY_SUBTRACT x y))
   ([x y & more]
@@ -1067,7 +1116,9 @@
   "Returns non-nil if nums are in monotonically increasing order, otherwise
   false."
   {:added "1.0"
-   :static true}
+   :static true
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP "<" x y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "<" x y))
   ([x y & more]
@@ -1080,7 +1131,9 @@
 (defn <=
   "Returns non-nil if nums are in monotonically non-decreasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP "<=" x y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "<=" x y))
   ([x y & more]
@@ -1093,7 +1146,9 @@
 (defn >
   "Returns non-nil if nums are in monotonically decreasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP ">" x y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP ">" x y))
   ([x y & more]
@@ -1106,7 +1161,9 @@
 (defn >=
   "Returns non-nil if nums are in monotonically non-increasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x y] (list 'py.bytecode/COMPARE_OP ">=" x y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP ">=" x y))
   ([x y & more]
@@ -1132,7 +1189,8 @@
 (defn dec
   "Returns a number one less than num. Does not auto-promote longs, will throw
   on overflow. See also: dec'"
-  {:added "1.2"}
+  {:added "1.2"
+   :inline (fn [x] (list 'py.bytecode/BINARY_SUBTRACT x 1))}
   [x] (py.bytecode/BINARY_SUBTRACT x 1))
 
 (defn max
@@ -1153,7 +1211,8 @@
 
 (defn zero?
   "Returns true if num is zero, else false"
-  {:added "1.0"}
+  {:added "1.0"
+   :inline (fn [x] (list 'py.bytecode/COMPARE_OP "==" x 0))}
   [x] (py.bytecode/COMPARE_OP "==" x 0))
 
 (defn pos?
@@ -1908,7 +1967,13 @@
   {:added "1.0"}
   [& maps]
   (when (some identity maps)
-    (reduce1 #(conj (or %1 {}) %2) maps)))
+    (let [m (or (first maps) {})]
+      (if (instance? clojure.lang.ieditablecollection/IEditableCollection m)
+        (with-meta (persistent! (reduce1 #(if %2 (conj! %1 %2) %1)
+                                         (transient m)
+                                         (rest maps)))
+                   (meta m))
+        (reduce1 #(conj (or %1 {}) %2) maps)))))
 
 (defn merge-with
   "Returns a map that consists of the rest of the maps conj-ed onto the first.
@@ -1931,14 +1996,14 @@
   "Returns a map with the keys mapped to the corresponding vals."
   {:added "1.0"}
   [keys vals]
-    (loop [map {}
+    (loop [map (transient {})
            ks (seq keys)
            vs (seq vals)]
       (if (and ks vs)
-        (recur (assoc map (first ks) (first vs))
+        (recur (assoc! map (first ks) (first vs))
                (next ks)
                (next vs))
-        map)))
+        (persistent! map))))
 
 (defn line-seq
   "Returns the lines of text from rdr as a lazy sequence of strings. rdr must
@@ -2288,31 +2353,54 @@
                (let [pvec
                      (fn [bvec b val]
                        (let [gvec (gensym "vec__")]
-                         (loop [ret (-> bvec (conj gvec) (conj val))
-                                n 0
+                         (loop [items []
+                                rest-b nil
+                                as-b nil
                                 bs b
                                 seen-rest? false]
                            (if (seq bs)
                              (let [firstb (first bs)]
                                (cond
-                                (= firstb '&) (recur (pb ret (second bs) (list `nthnext gvec n))
-                                                     n
-                                                     (nnext bs)
-                                                     true)
-                                (= firstb :as) (pb ret (second bs) gvec)
+                                (= firstb '&) (recur items (second bs) as-b (nnext bs) true)
+                                (= firstb :as) (recur items rest-b (second bs) nil seen-rest?)
                                 :else (if seen-rest?
                                         (throw (py/Exception "Unsupported binding form, only :as can follow & parameter"))
-                                        (recur (pb ret firstb  (list `nth gvec n nil))
-                                               (inc n)
-                                               (next bs)
-                                               seen-rest?))))
-                             ret))))
+                                        (recur (conj items firstb) rest-b as-b (next bs) seen-rest?))))
+                             ;; the positional items are unpacked from a
+                             ;; tuple, built in one go for vectors, Python
+                             ;; sequences and nil, and by nth for the rest
+                             (let [n (count items)
+                                   syms (vec (map #(if (symbol? %) % (gensym "nth__")) items))
+                                   ret (-> bvec (conj gvec) (conj val))
+                                   ret (if (pos? n)
+                                         (-> ret
+                                             (conj syms)
+                                             (conj `(let* [tuple# (clojure.lang.rt/indexedTuple ~gvec ~n)]
+                                                      (py/if tuple#
+                                                             tuple#
+                                                             ~(apply list 'py.bytecode/BUILD_TUPLE n
+                                                                     (map #(list `nth gvec % nil) (range n)))))))
+                                         ret)
+                                   ret (reduce1 (fn [ret i]
+                                                  (if (symbol? (nth items i))
+                                                    ret
+                                                    (pb ret (nth items i) (nth syms i))))
+                                                ret
+                                                (range n))
+                                   ret (if rest-b
+                                         (pb ret rest-b (list `nthnext gvec n))
+                                         ret)]
+                               (if as-b
+                                 (pb ret as-b gvec)
+                                 ret))))))
                      pmap
                      (fn [bvec b v]
                        (let [gmap (or (:as b) (gensym "map__"))
                              defaults (:or b)]
                          (loop [ret (-> bvec (conj gmap) (conj v)
-                                        (conj gmap) (conj `(if (seq? ~gmap) (apply hash-map ~gmap) ~gmap)))
+                                        (conj gmap) (conj `(py/if (py/isinstance ~gmap clojure.lang.iseq/ISeq)
+                                                              (apply hash-map ~gmap)
+                                                              ~gmap)))
                                 bes (reduce1
                                      (fn [bes entry]
                                        (reduce1 #(assoc %1 %2 ((val entry) %2))
@@ -3842,8 +3930,17 @@ Returns val."
     (. ref (touch))
     (. ref (deref)))
 
-(require 'multiprocessing.pool)
-(def solo-executor (multiprocessing.pool/ThreadPool))
+(def
+  ^{:doc "Returns the thread pool futures run on. The pool (and
+  multiprocessing.pool) is only set up the first time it is needed, so that
+  loading clojure.core starts no threads."}
+  solo-executor
+  (clojure.lang.threadutil/synchronized
+    (let [pool (atom nil)]
+      (fn solo-executor []
+        (or @pool
+            (reset! pool (.ThreadPool
+                           (.-pool (py/__import__ "multiprocessing.pool")))))))))
 
 (defn future-call
   "Takes a function of no args and yields a future object that will
@@ -3852,7 +3949,7 @@ Returns val."
   not yet finished, calls to deref/@ will block."
   {:added "1.1"}
   [f]
-  (let [res (.apply_async solo-executor f)]
+  (let [res (.apply_async (solo-executor) f)]
     (reify
       IPending
        (isRealized [_] (.ready res))
@@ -3886,7 +3983,63 @@ Returns val."
   {:added "1.0"
    :static true}
   [to from]
-  (reduce conj to from))
+  (if (instance? clojure.lang.ieditablecollection/IEditableCollection to)
+    (with-meta (persistent! (reduce conj! (transient to) from)) (meta to))
+    (reduce conj to from)))
+
+(defn mapv
+  "Returns a vector consisting of the result of applying f to the
+  set of first items of each coll, followed by applying f to the set
+  of second items in each coll, until any one of the colls is
+  exhausted.  Any remaining items in other colls are ignored. Function
+  f should accept number-of-colls arguments."
+  {:added "1.4"
+   :static true}
+  ([f coll]
+   (-> (reduce (fn [v o] (conj! v (f o))) (transient []) coll)
+       persistent!))
+  ([f c1 c2]
+   (into [] (map f c1 c2)))
+  ([f c1 c2 c3]
+   (into [] (map f c1 c2 c3)))
+  ([f c1 c2 c3 & colls]
+   (into [] (apply map f c1 c2 c3 colls))))
+
+(defn filterv
+  "Returns a vector of the items in coll for which
+  (pred item) returns true. pred must be free of side-effects."
+  {:added "1.4"
+   :static true}
+  [pred coll]
+  (-> (reduce (fn [v o] (if (pred o) (conj! v o) v))
+              (transient [])
+              coll)
+      persistent!))
+
+(defn frequencies
+  "Returns a map from distinct items in coll to the number of times
+  they appear."
+  {:added "1.2"
+   :static true}
+  [coll]
+  (persistent!
+   (reduce (fn [counts x]
+             (assoc! counts x (inc (get counts x 0))))
+           (transient {}) coll)))
+
+(defn group-by
+  "Returns a map of the elements of coll keyed by the result of
+  f on each element. The value at each key will be a vector of the
+  corresponding elements, in the order they appeared in coll."
+  {:added "1.2"
+   :static true}
+  [f coll]
+  (persistent!
+   (reduce
+    (fn [ret x]
+      (let [k (f x)]
+        (assoc! ret k (conj (get ret k []) x))))
+    (transient {}) coll)))
 
 (defmacro lazy-cat
   "Expands to code which yields a lazy sequence of the concatenation of the
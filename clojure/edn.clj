@@ -0,0 +1,28 @@
+(ns ^{:doc "Reading edn data (https://github.com/edn-format/edn).
+
+  Unlike clojure.core/read-string, nothing is evaluated or resolved. Tagged
+  literals #tag form are read by the function for tag in the :readers map of
+  opts (#inst and #uuid are built in), or else by the function of the tag and
+  the form in :default."}
+  clojure.edn
+  (:require [clojure.lang.ednreader :as ednreader]))
+
+(defn read-string
+  "Reads one object from the string s. Returns nil when s is empty."
+  ([s] (read-string {} s))
+  ([opts s] (ednreader/readString s (:readers opts) (:default opts))))
+
+(defn read-seq
+  "Returns a lazy seq of the top-level objects of the edn file f, a path or a
+  file open for reading. The file is read in chunks as the seq is realized,
+  so that a seq whose head is not retained is read in constant memory."
+  ([f] (read-seq {} f))
+  ([opts f] (seq (ednreader/readSeq f (:readers opts) (:default opts)))))
+
+(defn indexed
+  "Returns the top-level objects of the edn file at path f as an indexed
+  collection: nth parses only the requested object from the memory-mapped
+  file, using the offsets of the objects stored next to the file (in f plus
+  .ednidx), which are recomputed whenever the file changes."
+  ([f] (indexed {} f))
+  ([opts f] (ednreader/IndexedEdnFile f (:readers opts) (:default opts))))
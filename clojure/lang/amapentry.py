@@ -10,6 +10,8 @@ class AMapEntry(APersistentVector):
 
     This is a pseudo-abstract class and should not be directly
     instantiated. See: MapEntry"""
+    __slots__ = ()
+
     def __getitem__(self, i):
         """Return the key or value if i is 0 or 1, respectively.
 
@@ -6,6 +6,7 @@ from clojure.lang.iprintable import IPrintable
 from clojure.lang.indexableseq import IndexableSeq
 from clojure.lang.ipersistentset import IPersistentSet
 from clojure.lang.ipersistentvector import IPersistentVector
+from clojure.lang.slots import getState, setState
 from clojure.lang.cljexceptions import ArityException
 from clojure.lang.cljexceptions import IndexOutOfBoundsException
 
@@ -14,6 +15,10 @@ class APersistentVector(IPersistentVector, IPrintable):
     """Pseudo-Abstract class to define a persistent vector.
 
     For concrete classes see: PersistentVector, MapEntry, and SubVec."""
+    __slots__ = ()
+    __getstate__ = getState
+    __setstate__ = setState
+
     def __iter__(self):
         """Return an iterator on this vector."""
         for x in range(len(self)):
@@ -31,6 +36,17 @@ class APersistentVector(IPersistentVector, IPrintable):
         index -- integer"""
         return self.nth(index)
 
+    def valAt(self, key, notFound=None):
+        """Return the item at index key, or notFound if key is not an index
+        of this vector.
+
+        key -- any object
+        notFound -- any object"""
+        if (isinstance(key, (int, long)) and not isinstance(key, bool)
+            and 0 <= key < len(self)):
+            return self[key]
+        return notFound
+
     def seq(self):
         """Return an IndexableSeq on this vector or None if empty."""
         if not len(self):
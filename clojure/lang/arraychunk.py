@@ -0,0 +1,62 @@
+from clojure.lang.ichunk import IChunk
+from clojure.lang.cljexceptions import (IllegalStateException,
+                                        IndexOutOfBoundsException)
+
+
+# The default of nth's notFound, which may be given as None.
+_notSupplied = object()
+
+
+class ArrayChunk(IChunk):
+    """A window on the items off to end (exclusive) of a list or tuple.
+
+    The chunks of a chunked seq. The array is shared, not copied, and must
+    not be changed while the chunk is in use."""
+    __slots__ = ("array", "off", "end")
+
+    def __init__(self, array, off=0, end=None):
+        """Instantiate an ArrayChunk.
+
+        array -- list or tuple
+        off -- integer, index of the first item of the chunk in array
+        end -- integer, index in array after the last item, defaults to the
+               length of array"""
+        self.array = array
+        self.off = off
+        self.end = len(array) if end is None else end
+
+    def __getitem__(self, i):
+        """Return the item at index i of this chunk."""
+        return self.array[self.off + i]
+
+    def nth(self, i, notFound=_notSupplied):
+        """Return the item at index i.
+
+        If i is out of bounds and notFound is supplied, return notFound, else
+        raise IndexOutOfBoundsException."""
+        if 0 <= i < self.end - self.off:
+            return self.array[self.off + i]
+        if notFound is _notSupplied:
+            raise IndexOutOfBoundsException()
+        return notFound
+
+    def __len__(self):
+        """Return the number of items in this chunk."""
+        return self.end - self.off
+
+    def dropFirst(self):
+        """Return an ArrayChunk on the same array without the first item.
+
+        May raise IllegalStateException if this chunk is empty."""
+        if self.off == self.end:
+            raise IllegalStateException("dropFirst of empty chunk")
+        return ArrayChunk(self.array, self.off + 1, self.end)
+
+    def reduce(self, f, start):
+        """Return the result of reducing f over the items of this chunk,
+        starting from start."""
+        ret = start
+        array = self.array
+        for x in xrange(self.off, self.end):
+            ret = f(ret, array[x])
+        return ret
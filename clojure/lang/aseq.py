@@ -14,6 +14,8 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 
 
 class ASeq(Obj, Sequential, ISeq, IHashEq, Iterable, IPrintable):
+    __slots__ = ()
+
     def __eq__(self, other):
         if self is other:
             return True
@@ -4,6 +4,8 @@ from clojure.lang.ipersistentcollection import IPersistentCollection
 
 
 class Associative(ILookup, IPersistentCollection):
+    __slots__ = ()
+
     def containsKey(self, key):
         raise AbstractMethodCall(self)
 
@@ -1,8 +1,8 @@
 from clojure.lang.ifn import IFn
 from clojure.lang.cljexceptions import AbstractMethodCall
 from clojure.lang.itransientmap import ITransientMap
-import clojure.lang.rt as RT
 from clojure.lang.iprintable import IPrintable
+from clojure.lang.util import conjToAssoc
 
 class ATransientMap(IFn, ITransientMap, IPrintable):
     def ensureEditable(self):
@@ -25,14 +25,14 @@ class ATransientMap(IFn, ITransientMap, IPrintable):
 
     def conj(self, val):
         self.ensureEditable()
-        return RT.conjToAssoc(self, val)
+        return conjToAssoc(self, val)
 
     def __call__(self, *args):
         return apply(self.valAt, args)
 
     def without(self, key):
         self.ensureEditable()
-        return self.doWithout()
+        return self.doWithout(key)
 
     def valAt(self, key, notFound = None):
         self.ensureEditable()
@@ -44,11 +44,14 @@ class ATransientMap(IFn, ITransientMap, IPrintable):
 
     def count(self):
         self.ensureEditable()
+        return self.doCount()
+
+    def __len__(self):
         return self.count()
 
     def persistent(self):
         self.ensureEditable()
-        return self.persistent()
+        return self.doPersistent()
 
     def writeAsString(self, writer):
         writer.write(repr(self))
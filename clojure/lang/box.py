@@ -1,3 +1,10 @@
+from clojure.lang.slots import getState, setState
+
+
 class Box(object):
+    __slots__ = ("val",)
+    __getstate__ = getState
+    __setstate__ = setState
+
     def __init__(self, val):
         self.val = val
@@ -0,0 +1,235 @@
+"""On-disk cache of the compiled top-level forms of a clj file, and
+ahead-of-time compiled modules.
+
+The cache of foo.clj lives next to it, in foo.cljc. It holds the code objects
+of the top-level forms of the file, in the order they were compiled and with
+their constants relocated (see clojure.lang.constpool), behind a header
+recording the source file's mtime and size, the compiler version, the
+Python bytecode magic number, and the paths, mtimes and sizes of the clj
+files it was compiled against. A cache that does not match its source or
+one of those files is ignored (and eventually overwritten).
+
+An ahead-of-time compiled module, foo.pyc, holds the same code objects in a
+regular Python module whose code runs them in order; it can be imported
+without foo.clj. See clojure.main.compileNamespace.
+"""
+
+import imp
+import marshal
+import os
+import struct
+import sys
+
+from clojure.lang.cljexceptions import RelocationException
+from clojure.lang.compiler import COMPILER_VERSION
+from clojure.lang.constpool import relocate
+from clojure.util.byteplay import (Code, LOAD_ATTR, LOAD_CONST, LOAD_NAME,
+                                   IMPORT_NAME, CALL_FUNCTION, POP_TOP,
+                                   RETURN_VALUE)
+
+
+CACHE_SUFFIX = ".cljc"
+MAGIC = "clojure-py cache"
+CORE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core.clj")
+# .pyc, or .pyo when running with -O
+MODULE_SUFFIX = [suffix for suffix, mode, kind in imp.get_suffixes()
+                 if kind == imp.PY_COMPILED][0]
+
+
+def cachePath(filename):
+    """Returns the path of the cache file of a clj file.
+    """
+    return os.path.splitext(filename)[0] + CACHE_SUFFIX
+
+
+def modulePath(filename):
+    """Returns the path of the compiled module of a clj file.
+    """
+    return os.path.splitext(filename)[0] + MODULE_SUFFIX
+
+
+def isModuleFresh(filename):
+    """Returns whether a clj file has a compiled module built from its
+    current version, by the current compiler and against the current
+    versions of the clj files it depends on (see sourceStamp).
+    """
+    try:
+        with open(modulePath(filename), "rb") as fl:
+            if fl.read(4) != imp.get_magic():
+                return False
+            fl.read(4)
+            code = marshal.load(fl)
+        stamps = [c for c in code.co_consts
+                  if isinstance(c, tuple) and c[:1] == (MAGIC,)]
+        return (len(stamps) == 1 and stamps[0] ==
+                sourceStamp(filename, stampDependencies(stamps[0])))
+    except (IOError, OSError, EOFError, ValueError, TypeError, IndexError):
+        return False
+
+
+def fileStamp(filename):
+    """Returns the absolute path, mtime and size of a file.
+    """
+    st = os.stat(filename)
+    return os.path.abspath(filename), st.st_mtime, st.st_size
+
+
+def sourceStamp(filename, dependencies=()):
+    """Returns the header identifying the current version of a clj file
+    compiled against the clj files in dependencies.
+
+    The code of a file depends on the macros, inlined fns and static Vars of
+    the namespaces it uses, so the stamps of the files loaded while it was
+    compiled are part of the header, as is the stamp of clojure/core.clj.
+    """
+    paths = set(os.path.abspath(path) for path in dependencies)
+    paths.add(CORE_FILE)
+    paths.discard(os.path.abspath(filename))
+    st = os.stat(filename)
+    return (MAGIC, COMPILER_VERSION, imp.get_magic(),
+            st.st_mtime, st.st_size,
+            tuple(fileStamp(path) for path in sorted(paths)))
+
+
+def stampDependencies(stamp):
+    """Returns the paths of the clj files recorded in a header returned by
+    sourceStamp.
+    """
+    return tuple(path for path, mtime, size in stamp[-1])
+
+
+def readCache(filename):
+    """Returns the paths of the clj files a clj file was compiled against
+    and its cached code objects, still relocated; they must go through
+    clojure.lang.constpool.resolve before being run.
+
+    None is returned if there is no cache, or if it is stale or unreadable.
+    """
+    try:
+        with open(cachePath(filename), "rb") as fl:
+            stamp = marshal.load(fl)
+            dependencies = stampDependencies(stamp)
+            if stamp != sourceStamp(filename, dependencies):
+                return None
+            return dependencies, marshal.load(fl)
+    except (IOError, OSError, EOFError, ValueError, TypeError, IndexError):
+        return None
+
+
+def writeAtomically(path, data):
+    """Writes data to path.
+
+    The data is written to a temporary file first, then renamed, so that
+    concurrent readers never see a partial file, and an interrupted write
+    leaves no file behind. Errors are raised, after removing the temporary
+    file.
+    """
+    tmp = "{0}.{1}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp, "wb") as fl:
+            fl.write(data)
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp, path)
+    except:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def writeMarshalled(path, *objs):
+    """Marshals objs to path, one after the other (see writeAtomically).
+    Returns whether the file was written.
+    """
+    try:
+        writeAtomically(path, "".join(marshal.dumps(obj) for obj in objs))
+    except (IOError, OSError):
+        return False
+    return True
+
+
+class CacheWriter(object):
+    """Collects the code objects of a clj file as they are compiled, and
+    writes them to the cache once the whole file has been compiled.
+
+    If any code object cannot be relocated, the cache is not written.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.codes = []
+        # the clj files loaded while compiling, see sourceStamp
+        self.dependencies = set()
+        self.valid = not sys.dont_write_bytecode
+
+    def add(self, code, refs=None):
+        """Adds the code object of a top-level form, given the origins of its
+        constants as returned by Compiler.popConstRefs.
+        """
+        if not self.valid:
+            return
+        try:
+            code = relocate(code, refs)
+            marshal.dumps(code)
+        except (RelocationException, ValueError):
+            self.valid = False
+            self.codes = []
+            return
+        self.codes.append(code)
+
+    def commit(self):
+        """Writes the cache, if possible. Returns whether it was written.
+        """
+        if not self.valid:
+            return False
+        try:
+            stamp = sourceStamp(self.filename, self.dependencies)
+        except OSError:
+            return False
+        return writeMarshalled(cachePath(self.filename),
+                               stamp, tuple(self.codes))
+
+
+class ModuleWriter(CacheWriter):
+    """Collects the code objects of a clj file as they are compiled, and
+    writes them as an importable Python module next to the clj file.
+
+    Unlike CacheWriter, a constant that cannot be relocated is an error.
+    """
+
+    def __init__(self, filename):
+        CacheWriter.__init__(self, filename)
+        self.valid = True
+
+    def add(self, code, refs=None):
+        self.codes.append(relocate(code, refs))
+
+    def moduleCode(self):
+        """Returns the code of the module: it imports clojure.main and
+        hands the header of the clj file (see sourceStamp) and the code
+        objects over to clojure.main.loadCompiledModule.
+        """
+        code = [(LOAD_CONST, -1),
+                (LOAD_CONST, ("loadCompiledModule",)),
+                (IMPORT_NAME, "clojure.main"),
+                (LOAD_ATTR, "loadCompiledModule"),
+                (LOAD_NAME, "__name__"),
+                (LOAD_CONST, sourceStamp(self.filename, self.dependencies)),
+                (LOAD_CONST, tuple(self.codes)),
+                (CALL_FUNCTION, 3),
+                (POP_TOP, None),
+                (LOAD_CONST, None),
+                (RETURN_VALUE, None)]
+        return Code(code, [], [], False, False, False, "<module>",
+                    self.filename, 0, None).to_code()
+
+    def commit(self):
+        """Writes the module (see writeAtomically). Returns its path; errors
+        are raised.
+        """
+        path = modulePath(self.filename)
+        mtime = int(os.stat(self.filename).st_mtime)
+        writeAtomically(path, imp.get_magic() + struct.pack("<i", mtime)
+                              + marshal.dumps(self.moduleCode()))
+        return path
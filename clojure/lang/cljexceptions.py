@@ -58,6 +58,12 @@ class CompilerException(Exception):
         Exception.__init__(self, msg)
 
 
+class RelocationException(CljException):
+    def __init__(self, reason, const):
+        CljException.__init__(
+            self, "Can't relocate constant {0!r}: {1}".format(const, reason))
+
+
 class NoNamespaceException(ImportError):
     def __init__(self, lib, ns):
         msg = "Importing {0} did not create namespace {1}.".format(lib, ns)
@@ -28,6 +28,10 @@ class Keyword(IFn, Named, IPrintable):
     def __hash__(self):
         return self.hash
 
+    def __reduce__(self):
+        # Unpickled keywords are interned too.
+        return Keyword, (self.sym.ns, self.sym.name)
+
     def __call__(self, obj, notFound=None):
         if obj is None:
             return None
@@ -1,16 +1,18 @@
 import __builtin__
-import dis
 import marshal
 import pickle
-import py_compile
 import re
 import sys
-import time
 import fractions
 
 from clojure.lang.cons import Cons
-from clojure.lang.cljexceptions import CompilerException, AbstractMethodCall
-from clojure.lang.cljkeyword import Keyword
+from clojure.lang.cljexceptions import (AbstractMethodCall, ArityException,
+                                        CompilerException)
+from clojure.lang.associative import Associative
+from clojure.lang.cljkeyword import Keyword, TAG_KEY
+from clojure.lang.ilookup import ILookup
+from clojure.lang.indexed import Indexed
+from clojure.lang.ipersistentcollection import IPersistentCollection
 from clojure.lang.ipersistentvector import IPersistentVector
 from clojure.lang.ipersistentmap import IPersistentMap
 from clojure.lang.ipersistentset import IPersistentSet
@@ -19,16 +21,20 @@ from clojure.lang.iseq import ISeq
 from clojure.lang.lispreader import _AMP_, LINE_KEY, garg
 from clojure.lang.namespace import Namespace, findNS, findItem, intern
 from clojure.lang.persistentlist import PersistentList, EmptyList
+from clojure.lang.peephole import optimize
 from clojure.lang.persistentvector import PersistentVector
 import clojure.lang.rt as RT
 from clojure.lang.symbol import Symbol
-from clojure.lang.var import Var, threadBindings
+from clojure.lang.var import Var, STATIC_KEY, threadBindings
 from clojure.util.byteplay import *
 import clojure.util.byteplay as byteplay
 import marshal
 import types
 
 _MACRO_ = Keyword("macro")
+_INLINE_ = Keyword("inline")
+_INLINE_ARITIES_ = Keyword("inline-arities")
+_QUOTE_ = Symbol("quote")
 _NS_ = Symbol("*ns*")
 version = (sys.version_info[0] * 10) + sys.version_info[1]
 
@@ -37,6 +43,10 @@ PTR_MODE_DEREF = "PTR_MODE_DEREF"
 
 AUDIT_CONSTS = False
 
+# Bump whenever the bytecode emitted for a given form changes, so that the
+# cached code of clj files (see clojure.lang.bytecodecache) is recompiled.
+COMPILER_VERSION = 14
+
 class MetaBytecode(object):
     pass
 
@@ -56,6 +66,7 @@ class GlobalPtr(MetaBytecode):
         if isinstance(val, Var):
             if not val.isDynamic():
                 val = val.deref()
+                comp.registerConstRef(val, "deref", module.__name__, self.name)
                 return [(LOAD_CONST, val)]
             else:
                 if mode is PTR_MODE_DEREF:
@@ -69,6 +80,26 @@ class GlobalPtr(MetaBytecode):
                (LOAD_ATTR, self.name)]
 
 
+class ArityPtr(GlobalPtr):
+    """A GlobalPtr to a fn called with a known number of arguments. If the
+    Var is static and its fn has an overload of its own for them (see
+    multiArityFn), the function of that overload is loaded instead.
+    """
+    def __init__(self, ns, name, nargs):
+        GlobalPtr.__init__(self, ns, name)
+        self.nargs = nargs
+
+    def emit(self, comp, mode):
+        val = getattr(self.ns, self.name)
+        if isinstance(val, Var) and not val.isDynamic():
+            fn = arityFn(val.deref(), self.nargs)
+            if fn is not None:
+                comp.registerConstRef(fn, "arity", self.ns.__name__,
+                                      self.name, self.nargs)
+                return [(LOAD_CONST, fn)]
+        return GlobalPtr.emit(self, comp, mode)
+
+
 def expandMetas(bc, comp):
     code = []
     for x in bc:
@@ -158,12 +189,19 @@ def compileDef(comp, form):
     comp.pushName(RT.name(sym))
     code = []
     v = intern(comp.getNS(), sym)
+    comp.registerConstRef(v, "def", comp.getNS().__name__, sym.name,
+                          sym.meta())
 
     v.setDynamic(True)
     if len(form) == 3:
         code.append((LOAD_CONST, v))
         code.append((LOAD_ATTR, "bindRoot"))
-        compiledValue = comp.compile(value)
+        comp.staticFn = (sym.meta() is not None
+                         and bool(sym.meta()[STATIC_KEY]))
+        try:
+            compiledValue = comp.compile(value)
+        finally:
+            comp.staticFn = False
         if isinstance(value, ISeq) \
            and value.first().getName() == 'fn' \
            and sym.meta() is not None:
@@ -290,16 +328,28 @@ def compileLetStar(comp, form):
     while bindings:
         local, bindings = bindings.first(), bindings.next()
         body, bindings = bindings.first(), bindings.next()
-        if not isinstance(local, Symbol) or local.ns is not None:
-            raise CompilerException(
-                "bindings must be non-namespaced symbols", form)
-        code.extend(comp.compile(body))
-        alias = RenamedLocal(Symbol("{0}_{1}".format(local, RT.nextID()))
-                             if comp.getAlias(local)
-                             else local)
-        comp.pushAlias(local, alias)
-        args.append(local)
-        code.extend(alias.compileSet(comp))
+        if isinstance(local, IPersistentVector) and len(local):
+            # [a b c] tuple: the value of body is a tuple of exactly that
+            # many items, unpacked into the locals (see destructure)
+            locals = list(local)
+            code.extend(comp.compile(body))
+            code.append((UNPACK_SEQUENCE, len(locals)))
+        else:
+            locals = [local]
+            code.extend(comp.compile(body))
+        for local in locals:
+            if not isinstance(local, Symbol) or local.ns is not None:
+                raise CompilerException(
+                    "bindings must be non-namespaced symbols", form)
+            alias = RenamedLocal(Symbol("{0}_{1}".format(local, RT.nextID()))
+                                 if comp.getAlias(local)
+                                 else local)
+            alias.tag = tagOf(comp, local) or (len(locals) == 1
+                                               and inferType(comp, body)
+                                               or None)
+            comp.pushAlias(local, alias)
+            args.append(local)
+            code.extend(alias.compileSet(comp))
     form = form.next()
     code.extend(compileImplcitDo(comp, form))
     comp.popAliases(args)
@@ -329,7 +379,7 @@ def compileDot(comp, form):
 
     alias = comp.getAlias(clss)
     if alias:
-        code = alias.compile(comp)
+        code = comp.compileAlias(clss)
         code.append((LOAD_ATTR, attr))
     else:
         code = comp.compile(Symbol(clss, attr))
@@ -377,6 +427,7 @@ def compileIfStar(comp, form):
     """
     if len(form) != 3 and len(form) != 4:
         raise CompilerException("if takes 2 or 3 args", form)
+    isbool = inferType(comp, form.next().first()) is bool
     cmp = comp.compile(form.next().first())
     body = comp.compile(form.next().next().first())
     if len(form) == 3:
@@ -386,19 +437,23 @@ def compileIfStar(comp, form):
 
     elseLabel = Label("IfElse")
     endlabel = Label("IfEnd")
-    condition_name = garg(0).name
     code = cmp
-    code.append((STORE_FAST, condition_name))
-    code.append((LOAD_FAST, condition_name))
-    code.append((LOAD_CONST, None))
-    code.append((COMPARE_OP, 'is not'))
-    code.extend(emitJump(elseLabel))
-    code.append((LOAD_FAST, condition_name))
-    code.append((LOAD_CONST, False))
-    code.append((COMPARE_OP, 'is not'))
-    # Use is not instead of != as bool is a subclass of int, and
-    # therefore False == 0
-    code.extend(emitJump(elseLabel))
+    if isbool:
+        # a bool is false exactly when it is False, a single jump will do
+        code.extend(emitJump(elseLabel))
+    else:
+        condition_name = garg(0).name
+        code.append((STORE_FAST, condition_name))
+        code.append((LOAD_FAST, condition_name))
+        code.append((LOAD_CONST, None))
+        code.append((COMPARE_OP, 'is not'))
+        code.extend(emitJump(elseLabel))
+        code.append((LOAD_FAST, condition_name))
+        code.append((LOAD_CONST, False))
+        code.append((COMPARE_OP, 'is not'))
+        # Use is not instead of != as bool is a subclass of int, and
+        # therefore False == 0
+        code.extend(emitJump(elseLabel))
     code.extend(body)
     code.append((JUMP_ABSOLUTE, endlabel))
     code.extend(emitLanding(elseLabel))
@@ -463,10 +518,11 @@ def compileFn(comp, name, form, orgform):
     comp.popAliases(locals)
 
     clist = map(lambda x: RT.name(x.sym), comp.closureList())
-    code = expandMetas(code, comp)
+    code = optimize(expandMetas(code, comp))
     c = Code(code, clist, args, lastisargs, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
     if not clist:
         c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
+        comp.registerConstRef(c, "fn")
 
     return [(LOAD_CONST, c)], c
 
@@ -499,7 +555,7 @@ class MultiFn(object):
         body = form.next()
 
         self.locals, self.args, self.lastisargs, self.argsname = unpackArgs(argv)
-        endLabel = Label("endLabel")
+        self.endLabel = endLabel = Label("endLabel")
         argcode = [(LOAD_CONST, len),
             (LOAD_FAST, '__argsv__'),
             (CALL_FUNCTION, 1),
@@ -532,15 +588,34 @@ class MultiFn(object):
         comp.pushRecur(recur)
         bodycode.extend(compileImplcitDo(comp, body))
         bodycode.append((RETURN_VALUE, None))
-        bodycode.extend(emitLanding(endLabel))
         comp.popRecur()
         comp.popAliases(self.locals)
 
         self.argcode = argcode
         self.bodycode = bodycode
-
-
-def compileMultiFn(comp, name, form):
+        self.line = meta(argv)[LINE_KEY] if meta(argv) is not None else None
+
+    def arity(self):
+        """Returns the number of arguments this overload takes, not counting
+        the rest argument."""
+        return len(self.args) - (1 if self.lastisargs else 0)
+
+    def compileArity(self, comp, name):
+        """Returns the function of this overload alone, taking its arguments
+        directly."""
+        code = [(SetLineno, self.line or 0)]
+        if self.lastisargs:
+            code.extend(cleanRest(self.argsname.name))
+        code.extend(self.bodycode)
+        c = Code(optimize(expandMetas(code, comp)), [], self.args, self.lastisargs,
+                 False, True, str(Symbol(comp.getNS().__name__, name.name)),
+                 comp.filename, 0, None)
+        fn = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
+        comp.registerConstRef(fn, "fn")
+        return fn
+
+
+def compileMultiFn(comp, name, form, static):
     s = form
     argdefs = []
 
@@ -553,30 +628,86 @@ def compileMultiFn(comp, name, form):
             "Only one function overload may have variable number of arguments",
             form)
 
-    code = []
-    if len(argdefs) == 1 and not argdefs[0].lastisargs:
-        hasvararg = False
-        argslist = argdefs[0].args
-        code.extend(argdefs[0].bodycode)
-    else:
-        hasvararg = True
-        argslist = ["__argsv__"]
+    clist = map(lambda x: RT.name(x.sym), comp.closureList())
+    if not clist and static:
+        # Each overload is a function of its own, see multiArityFn.
+        arities = {}
+        variadic = None
         for x in argdefs:
-            code.extend(x.argcode)
-            code.extend(x.bodycode)
+            if x.lastisargs:
+                variadic = x.arity(), x.compileArity(comp, name)
+            else:
+                arities[x.arity()] = x.compileArity(comp, name)
+        size = max(arities.keys() + [variadic[0] if variadic else 0]) + 1
+        table = tuple(arities.get(n, variadic[1] if variadic
+                                  and n >= variadic[0] else None)
+                      for n in range(size))
+        variadic = variadic[1] if variadic else None
+        c = multiArityFn(comp.ns.__name__, name.name, table, variadic)
+        comp.registerConstRef(c, "multifn", comp.ns.__name__, name.name,
+                              table, variadic)
+        return [(LOAD_CONST, c)], c
 
-        code.append((LOAD_CONST, Exception))
-        code.append((CALL_FUNCTION, 0))
-        code.append((RAISE_VARARGS, 1))
+    code = []
+    argslist = ["__argsv__"]
+    for x in argdefs:
+        code.extend(x.argcode)
+        code.extend(x.bodycode)
+        code.extend(emitLanding(x.endLabel))
 
-    clist = map(lambda x: RT.name(x.sym), comp.closureList())
-    code = expandMetas(code, comp)
-    c = Code(code, clist, argslist, hasvararg, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
+    code.append((LOAD_CONST, Exception))
+    code.append((CALL_FUNCTION, 0))
+    code.append((RAISE_VARARGS, 1))
+
+    code = optimize(expandMetas(code, comp))
+    c = Code(code, clist, argslist, True, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
     if not clist:
         c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
+        comp.registerConstRef(c, "fn")
     return [(LOAD_CONST, c)], c
 
 
+def multiArityFn(ns, name, arities, variadic):
+    """Returns a fn of several overloads, calling the function of the
+    overload taking as many arguments as it is called with.
+
+    arities -- a tuple of the function taking n arguments (or None) at index
+               n
+    variadic -- the function taking a rest argument, called with more
+                arguments than arities covers, or None
+
+    Calls whose number of arguments is known at compile time can be bound to
+    the function of their overload directly (see arityFn).
+    """
+    size = len(arities)
+
+    def fn(*args):
+        n = len(args)
+        f = arities[n] if n < size else variadic
+        if f is None:
+            raise ArityException(
+                "Wrong number of args ({0}) passed to: {1}/{2}".format(
+                    n, ns, name))
+        return f(*args)
+
+    fn.__name__ = name
+    fn.__module__ = ns
+    setattr(fn, "_arities", (arities, variadic))
+    return fn
+
+
+def arityFn(fn, n):
+    """Returns the function of the overload of fn taking n arguments, or None
+    if fn is not a fn of several overloads (see multiArityFn) or has no such
+    overload."""
+    if not isinstance(fn, types.FunctionType):
+        return None
+    arities = getattr(fn, "_arities", None)
+    if arities is None:
+        return None
+    return arities[0][n] if n < len(arities[0]) else arities[1]
+
+
 def compileImplcitDo(comp, form):
     code = []
     s = form
@@ -592,21 +723,15 @@ def compileImplcitDo(comp, form):
 
 @register_builtin("fn*")
 def compileFNStar(comp, form):
-    haslocalcaptures = False
-    aliases = []
-    if len(comp.aliases) > 0: # we might have closures to deal with
-        for x in comp.aliases:
-
-            comp.pushAlias(x, Closure(x))
-            aliases.append(x)
-        haslocalcaptures = True
-
     orgform = form
     if len(form) < 2:
         raise CompilerException("2 or more arguments to fn* required", form)
     form = form.next()
     name = form.first()
     pushed = False
+    # only the fn of a static Var has its calls bound to its overloads, the
+    # others are better off without the extra call of the dispatcher
+    static, comp.staticFn = comp.staticFn, False
 
     if not isinstance(name, Symbol):
         name = comp.getNamesString() + "_auto_"
@@ -624,8 +749,12 @@ def compileFNStar(comp, form):
     # closure cell. Then after we create the closure with MAKE_CLOSURE we'll
     # populate this var with the correct value
 
+    # The locals of the enclosing fns are captured as they are used (see
+    # Compiler.compileAlias).
+    comp.pushClosures()
     selfalias = Closure(name)
     comp.pushAlias(name, selfalias)
+    comp.closures[-1].append(selfalias)
 
     # form = ([x] x)
     if isinstance(form.first(), IPersistentVector):
@@ -635,21 +764,19 @@ def compileFNStar(comp, form):
         code, ptr = compileFn(comp, name, RT.list(*form.first()), orgform)
     # form = (([x] x) ([x y] x))
     else:
-        code, ptr = compileMultiFn(comp, name, form)
+        code, ptr = compileMultiFn(comp, name, form, static)
 
     if pushed:
         comp.popName()
 
     clist = comp.closureList()
     fcode = []
-
-    if haslocalcaptures:
-        comp.popAliases(aliases)
+    comp.popClosures()
 
     if clist:
         for x in clist:
             if x is not selfalias:   #we'll populate selfalias later
-                fcode.extend(comp.getAlias(x.sym).compile(comp))  # Load our local version
+                fcode.extend(comp.compileAlias(x.sym))  # Load our local version
                 fcode.append((STORE_DEREF, RT.name(x.sym)))            # Store it in a Closure Cell
             fcode.append((LOAD_CLOSURE, RT.name(x.sym)))           # Push the cell on the stack
         fcode.append((BUILD_TUPLE, len(clist)))
@@ -666,11 +793,367 @@ def compileFNStar(comp, form):
         code.append((DUP_TOP, None))
         code.extend(selfalias.compileSet(comp))
 
-    comp.popAlias(Symbol(name)) #closure
+    return code
+
+
+# The types of the values that are compiled to themselves, and that can be
+# shared between evaluations.
+_constantTypes = frozenset([str, unicode, int, long, float, bool,
+                            fractions.Fraction, Keyword,
+                            type(re.compile(""))])
+
+# The clojure.core fns that are folded when all their arguments are constant
+# numbers (see constantValue).
+_foldable = frozenset(["+", "-", "*", "/", "inc", "dec", "quot", "rem",
+                       "mod", "max", "min"])
+
+NOT_CONSTANT = object()
+
+
+def constantValue(comp, form):
+    """Returns the value of a form if it is known at compile time, else
+    NOT_CONSTANT.
+
+    Literals, quoted forms and collection literals of constants are constant,
+    and so are calls to the arithmetic fns of clojure.core (see _foldable)
+    with constant numbers as arguments. Such forms are compiled to a single
+    LOAD_CONST of their prebuilt value instead of being rebuilt on every
+    evaluation.
+    """
+    if form is None or type(form) in _constantTypes:
+        return form
+    if isinstance(form, IPersistentVector):
+        items = []
+        for x in form:
+            x = constantValue(comp, x)
+            if x is NOT_CONSTANT:
+                return NOT_CONSTANT
+            items.append(x)
+        return RT.vector(*items)
+    if isinstance(form, IPersistentMap):
+        kvs = []
+        for entry in RT.seqToTuple(RT.seq(form)):
+            k = constantValue(comp, entry.getKey())
+            v = constantValue(comp, entry.getValue())
+            if k is NOT_CONSTANT or v is NOT_CONSTANT:
+                return NOT_CONSTANT
+            kvs.extend((k, v))
+        return RT.map(*kvs)
+    if isinstance(form, IPersistentSet):
+        # set literals are not evaluated (see Compiler.compile)
+        for x in RT.seqToTuple(RT.seq(form)):
+            if constantValue(comp, x) is not x:
+                return NOT_CONSTANT
+        return form
+    if isinstance(form, EmptyList):
+        return form
+    if isinstance(form, (PersistentList, Cons)):
+        return foldCall(comp, form)
+    return NOT_CONSTANT
+
+
+def foldCall(comp, form):
+    """Returns the value of a quoted form, or of a call to a _foldable fn
+    with constant numbers as arguments, else NOT_CONSTANT."""
+    sym = form.first()
+    if not isinstance(sym, Symbol) or sym in comp.aliases:
+        return NOT_CONSTANT
+    if sym == _QUOTE_ and len(form) == 2:
+        return form.next().first()
+    var = findItem(comp.getNS(), sym)
+    if not (isinstance(var, Var) and var.ns is not None
+            and var.ns.__name__ == "clojure.core"
+            and var.sym.name in _foldable):
+        return NOT_CONSTANT
+    args = []
+    for x in RT.seqToTuple(form.next()):
+        x = constantValue(comp, x)
+        if (isinstance(x, bool)
+            or not isinstance(x, (int, long, float, fractions.Fraction))):
+            return NOT_CONSTANT
+        args.append(x)
+    try:
+        return var.deref()(*args)
+    except Exception:
+        # e.g. a division by zero, left to raise at run time
+        return NOT_CONSTANT
+
+
+# The type hints naming Python types, as in Clojure's primitive hints.
+_primitiveTags = {"int": int, "Integer": int,
+                  "long": long, "Long": long,
+                  "float": float, "double": float,
+                  "Float": float, "Double": float,
+                  "str": str, "String": str,
+                  "bool": bool, "boolean": bool, "Boolean": bool}
+
+_literalTypes = frozenset(_primitiveTags.values())
+_numericTypes = frozenset([int, long, float])
+
+# The clojure.core fns whose calls with numeric arguments only are compiled
+# to a chain of binary opcodes or comparisons (see specialize).
+_arithmeticOps = {"+": BINARY_ADD, "-": BINARY_SUBTRACT, "*": BINARY_MULTIPLY}
+_comparisonOps = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "=": "=="}
+_signOps = {"pos?": ">", "neg?": "<"}
+
+# The clojure.core fns that return a bool.
+_boolFns = frozenset(["=", "==", "not=", "<", "<=", ">", ">=", "identical?",
+                      "nil?", "instance?", "zero?", "pos?", "neg?", "true?",
+                      "false?", "not", "seq?", "string?", "map?", "vector?"])
+_boolForms = frozenset([Symbol("is?"), Symbol("py.bytecode", "COMPARE_OP"),
+                        Symbol("py.bytecode", "UNARY_NOT")])
+_ifForms = frozenset([Symbol("if*"), Symbol("py/if")])
+
+# Maps clojure.core fns to the interface whose method they call on their
+# first argument when it implements it, the name of that method, and the
+# numbers of arguments of the calls that are bound to it directly.
+_methodBindings = {
+    "nth": (Indexed, "nth", (2, 3)),
+    "get": (ILookup, "valAt", (2, 3)),
+    "conj": (IPersistentCollection, "cons", (2,)),
+    "assoc": (Associative, "assoc", (3,)),
+    "first": (ISeq, "first", (1,)),
+    "next": (ISeq, "next", (1,)),
+}
+
+
+def tagOf(comp, obj):
+    """Returns the type named by the :tag metadata of a Symbol or a Var, or
+    None if it has none or if it does not name a type."""
+    m = meta(obj)
+    tag = m[TAG_KEY] if m is not None else None
+    if isinstance(tag, Symbol):
+        if tag.ns is None and tag.name in _primitiveTags:
+            return _primitiveTags[tag.name]
+        tag = findItem(comp.getNS(), tag)
+    return tag if isinstance(tag, type) else None
+
+
+def coreFn(comp, form):
+    """Returns the name of the clojure.core fn a form calls, or None."""
+    sym = form.first()
+    if not isinstance(sym, Symbol) or sym in comp.aliases:
+        return None
+    var = findItem(comp.getNS(), sym)
+    if (isinstance(var, Var) and var.ns is not None
+        and var.ns.__name__ == "clojure.core"):
+        return var.sym.name
+    return None
+
+
+def inferType(comp, form):
+    """Returns the type of the value of a form if it is known at compile
+    time, else None.
+
+    The type of a literal is known, and so is the type of a local with a
+    :tag hint (or bound by let* to a form of known type), the type of a form
+    with a :tag hint and the type of a call to a fn whose Var has one. The
+    value of a hinted form may still be nil: the code specialized on a type
+    that nil does not have keeps a path for it.
+
+    Comparisons, is? and the predicates of _boolFns are bools, and so is an
+    if whose branches both are.
+    """
+    if type(form) in _literalTypes:
+        return type(form)
+    if isinstance(form, Symbol):
+        alias = comp.getAlias(form)
+        return alias.tag if alias is not None else None
+    if not isinstance(form, (PersistentList, Cons)):
+        return None
+    tag = tagOf(comp, form)
+    if tag is not None:
+        return tag
+    head = form.first()
+    if isinstance(head, Symbol) and head in _boolForms:
+        return bool
+    name = coreFn(comp, form)
+    if name in _boolFns:
+        return bool
+    if (isinstance(head, Symbol) and head in _ifForms
+        or name == "if") and len(form) == 4:
+        then, else_ = RT.seqToTuple(form.next().next())
+        tag = inferType(comp, then)
+        return tag if tag is inferType(comp, else_) else None
+    if name in _arithmeticOps or name in ("inc", "dec"):
+        argTypes = [inferType(comp, x) for x in RT.seqToTuple(form.next())]
+        if argTypes and all(t in _numericTypes for t in argTypes):
+            return float if float in argTypes else int
+        return None
+    sym = form.first()
+    if isinstance(sym, Symbol) and sym not in comp.aliases:
+        var = findItem(comp.getNS(), sym)
+        if isinstance(var, Var):
+            return tagOf(comp, var)
+    return None
+
+
+def isLocalOrLiteral(comp, form):
+    return (type(form) in _constantTypes
+            or isinstance(form, Symbol) and form in comp.aliases)
+
+
+def specialize(comp, form):
+    """Returns the code of a call to a clojure.core fn specialized for the
+    types of its arguments (see inferType), or None.
+
+    Arithmetic on numbers is chained binary opcodes and comparisons of
+    numbers are chained COMPARE_OPs (the calls with two arguments are
+    already inlined). The fns of _methodBindings call the method of their
+    first argument directly, and the fn itself when that argument is nil.
+    """
+    name = coreFn(comp, form)
+    if name is None:
+        return None
+    args = RT.seqToTuple(form.next())
+    if name in _arithmeticOps and len(args) > 2:
+        if not all(inferType(comp, x) in _numericTypes for x in args):
+            return None
+        code = comp.compile(args[0])
+        for x in args[1:]:
+            code.extend(comp.compile(x))
+            code.append((_arithmeticOps[name], None))
+        return code
+    if name in _comparisonOps and len(args) > 2:
+        # the operands are loaded twice, so they must be side effect free
+        if not all(inferType(comp, x) in _numericTypes
+                   and isLocalOrLiteral(comp, x) for x in args):
+            return None
+        endLabel = Label("CompareEnd")
+        code = []
+        for i in range(len(args) - 1):
+            if i:
+                if version == 26:
+                    code.extend([(JUMP_IF_FALSE, endLabel), (POP_TOP, None)])
+                else:
+                    code.append((JUMP_IF_FALSE_OR_POP, endLabel))
+            code.extend(comp.compile(args[i]))
+            code.extend(comp.compile(args[i + 1]))
+            code.append((COMPARE_OP, _comparisonOps[name]))
+        code.append((endLabel, None))
+        return code
+    if name in _signOps and len(args) == 1:
+        if inferType(comp, args[0]) not in _numericTypes:
+            return None
+        code = comp.compile(args[0])
+        code.extend([(LOAD_CONST, 0), (COMPARE_OP, _signOps[name])])
+        return code
+    if name in _methodBindings and args:
+        iface, method, nargs = _methodBindings[name]
+        tag = inferType(comp, args[0])
+        if (len(args) not in nargs or tag is None
+            or not issubclass(tag, iface)):
+            return None
+        # a hinted nil goes through the core fn
+        code, loaders = loadOnce(comp, args)
+        nilLabel = Label("BindingNil")
+        endLabel = Label("BindingEnd")
+        code.extend(loaders[0])
+        code.extend([(DUP_TOP, None),
+                     (LOAD_CONST, None),
+                     (COMPARE_OP, "is not")])
+        code.extend(emitJump(nilLabel))
+        code.append((LOAD_ATTR, method))
+        for x in loaders[1:]:
+            code.extend(x)
+        if name == "get" and len(args) == 2:
+            code.append((LOAD_CONST, None))
+            code.append((CALL_FUNCTION, 2))
+        else:
+            code.append((CALL_FUNCTION, len(args) - 1))
+        code.append((JUMP_FORWARD, endLabel))
+        code.extend(emitLanding(nilLabel))
+        code.append((POP_TOP, None))
+        code.extend(comp.compile(form.first()))
+        code.append((LOAD_CONST, None))
+        for x in loaders[1:]:
+            code.extend(x)
+        code.extend([(CALL_FUNCTION, len(args)),
+                     (endLabel, None)])
+        return code
+    return None
+
+
+def loadOnce(comp, forms):
+    """Returns the code that evaluates forms once, in order, and the list of
+    the codes that then load each of their values.
+
+    Locals and literals are loaded as they are, the other forms are stored
+    into temporaries.
+    """
+    code = []
+    loaders = []
+    for x in forms:
+        if x is None or isLocalOrLiteral(comp, x):
+            loaders.append(comp.compile(x))
+        else:
+            name = garg(0).name
+            code.extend(comp.compile(x))
+            code.append((STORE_FAST, name))
+            loaders.append([(LOAD_FAST, name)])
+    return code, loaders
+
+
+def compileLookup(comp, form):
+    """Returns the code of a keyword invocation (:k m) or of a call to get,
+    or None.
+
+    The collection is looked up with its own valAt method when it has one,
+    which is a single call where the keyword would test for the key and then
+    get it, each through a method of the collection. Anything else (nil,
+    Python dicts, strings) goes through the keyword or get.
+    """
+    head = form.first()
+    args = RT.seqToTuple(form.next())
+    if isinstance(head, Keyword) and len(args) in (1, 2):
+        coll, key = args[0], head
+        notFound = args[1] if len(args) == 2 else None
+        fallback = [(LOAD_CONST, head)]
+    elif coreFn(comp, form) == "get" and len(args) in (2, 3):
+        coll, key = args[:2]
+        notFound = args[2] if len(args) == 3 else None
+        fallback = comp.compile(head)
+        if fallback and type(fallback[-1]) is GlobalPtr:
+            fallback[-1] = ArityPtr(fallback[-1].ns, fallback[-1].name, 3)
+    else:
+        return None
+
+    # the arguments are loaded twice
+    code, loaders = loadOnce(comp, (coll, key, notFound))
+    collCode, keyCode, notFoundCode = loaders
+
+    fallbackLabel = Label("LookupFallback")
+    endLabel = Label("LookupEnd")
+    code.append((LOAD_CONST, getattr))
+    code.extend(collCode)
+    code.extend([(LOAD_CONST, "valAt"),
+                 (LOAD_CONST, None),
+                 (CALL_FUNCTION, 3),
+                 (DUP_TOP, None)])
+    code.extend(emitJump(fallbackLabel))
+    code.extend(keyCode)
+    code.extend(notFoundCode)
+    code.extend([(CALL_FUNCTION, 2),
+                 (JUMP_FORWARD, endLabel)])
+    code.extend(emitLanding(fallbackLabel))
+    code.append((POP_TOP, None))
+    code.extend(fallback)
+    code.extend(collCode)
+    if isinstance(head, Keyword):
+        code.extend(notFoundCode)
+        code.append((CALL_FUNCTION, 2))
+    else:
+        code.extend(keyCode)
+        code.extend(notFoundCode)
+        code.append((CALL_FUNCTION, 3))
+    code.append((endLabel, None))
     return code
 
 
 def compileVector(comp, form):
+    value = constantValue(comp, form)
+    if value is not NOT_CONSTANT:
+        return [(LOAD_CONST, value)]
     code = []
     code.extend(comp.compile(Symbol("clojure.lang.rt", "vector")))
     for x in form:
@@ -708,6 +1191,9 @@ def compileIs(comp, form):
 
 
 def compileMap(comp, form):
+    value = constantValue(comp, form)
+    if value is not NOT_CONSTANT:
+        return [(LOAD_CONST, value)]
     s = form.seq()
     c = 0
     code = []
@@ -1064,6 +1550,8 @@ top of eachother, let-macros can turn 'x into (.-x self), etc.
 
 class AAlias(object):
     """Base class for all aliases"""
+    # the type of the local, see inferType
+    tag = None
     def __init__(self, rest = None):
         self.rest = rest
     def compile(self, comp):
@@ -1204,6 +1692,76 @@ def macroexpand(form, comp, one=False):
     return form, False
 
 
+# Maps (Var, key) pairs to the form stored under key in the metadata of the
+# Var and the value it evaluated to (see evalMeta).
+_evaluatedMetas = {}
+
+
+def evalMeta(var, key):
+    """Returns the value of the form stored under key in the metadata of a
+    Var, evaluated in the namespace of the Var, or None if there is none.
+
+    The value is kept until the metadata of the Var changes.
+    """
+    m = var.meta()
+    form = m[key] if m is not None else None
+    if form is None:
+        return None
+    cached = _evaluatedMetas.get((var, key))
+    if cached is None or cached[0] is not form:
+        comp = Compiler()
+        comp.setNS(var.ns.__name__)
+        cached = _evaluatedMetas[(var, key)] = (
+            form, comp.executeCode(comp.compile(form)))
+    return cached[1]
+
+
+def inlineExpand(form, comp):
+    """Returns the expansion of a call to a Var with :inline metadata, or
+    None if the call is not to be inlined.
+
+    As in Clojure, :inline is a fn of the argument forms returning the form
+    to compile instead of the call, and the optional :inline-arities a
+    predicate on the number of arguments. Without it, the calls with a
+    number of arguments the :inline fn does not take are not inlined. Calls
+    to locals are never inlined.
+
+    An inlined call does not go through the Var, so it ignores redefinitions
+    and bindings of the Var made after it was compiled, even if the Var is
+    dynamic.
+    """
+    sym = form.first()
+    if not isinstance(sym, Symbol) or sym in comp.aliases:
+        return None
+    var = findItem(comp.getNS(), sym)
+    if not isinstance(var, Var) or var.ns is None:
+        return None
+    inline = evalMeta(var, _INLINE_)
+    if inline is None:
+        return None
+    args = RT.seqToTuple(form.next())
+    arities = evalMeta(var, _INLINE_ARITIES_)
+    if arities is not None:
+        if not arities(len(args)):
+            return None
+    elif not takesArgs(inline, len(args)):
+        return None
+    return inline(*args)
+
+
+def takesArgs(fn, n):
+    """Returns whether fn takes n arguments, as far as its code tells."""
+    if getattr(fn, "_arities", None) is not None:
+        return arityFn(fn, n) is not None
+    code = getattr(fn, "func_code", None)
+    if code is None:
+        return True
+    if n < code.co_argcount - len(fn.func_defaults or ()):
+        return False
+    return (n <= code.co_argcount
+            or bool(code.co_flags & byteplay.CO_VARARGS))
+
+
 class Compiler(object):
     def __init__(self):
         self.recurPoint = RT.list()
@@ -1211,15 +1769,44 @@ class Compiler(object):
         self.ns = clojure_core = Namespace("clojure.core")
         self.lastlineno = -1
         self.aliases = {}
+        # the Closures of each fn* being compiled, innermost last
+        self.closures = []
+        # whether the next fn* compiled is the value of a static Var
+        self.staticFn = False
         self.filename = "<unknown>"
         self._NS_ = findItem(clojure_core, _NS_)
+        self.constRefs = None
 
     def setFile(self, filename):
         self.filename = filename
 
+    def setRelocatable(self):
+        """Records where the live constants of the compiled code come from,
+        so that clojure.lang.constpool.relocate can replace them with
+        references. See popConstRefs.
+        """
+        self.constRefs = {}
+
+    def registerConstRef(self, obj, kind, *args):
+        if self.constRefs is not None:
+            self.constRefs[id(obj)] = (obj, kind) + args
+
+    def popConstRefs(self):
+        """Returns the constant origins recorded since the last call.
+
+        Must be called after each top-level form: a def only happens once.
+        """
+        refs = self.constRefs
+        if refs is not None:
+            self.constRefs = {}
+        return refs
+
     def pushAlias(self, sym, alias):
         """ Pushes this alias onto the alias stack for the entry sym.
             if no entry is found, a new one is created """
+        alias.depth = len(self.closures)
+        if alias.tag is None:
+            alias.tag = tagOf(self, sym)
         if sym in self.aliases:
             alias.rest = self.aliases[sym]
             self.aliases[sym] = alias
@@ -1305,7 +1892,22 @@ class Compiler(object):
                 return self.compilePropertyAccess(form)
             if form.first().name.startswith(".") and form.first().ns is None:
                 return self.compileMethodAccess(form)
+        value = foldCall(self, form)
+        if value is not NOT_CONSTANT:
+            return [(LOAD_CONST, value)]
+        specialized = specialize(self, form)
+        if specialized is not None:
+            return specialized
+        lookup = compileLookup(self, form)
+        if lookup is not None:
+            return lookup
+        inlined = inlineExpand(form, self)
+        if inlined is not None:
+            return self.compile(inlined)
         c = self.compile(form.first())
+        if c and type(c[-1]) is GlobalPtr:
+            # the call may go to the function of its overload directly
+            c[-1] = ArityPtr(c[-1].ns, c[-1].name, len(form) - 1)
         f = form.next()
         acount = 0
         while f is not None:
@@ -1369,19 +1971,38 @@ class Compiler(object):
         return self.compileAccessList(sym)
 
     def compileAlias(self, sym):
-        """ Compiles the given symbol as an alias."""
+        """ Compiles the given symbol as an alias.
+
+            A local of an enclosing fn* is captured by the fn* being
+            compiled: a Closure is pushed for it, so only the locals that
+            are actually used become cells. Enclosing fn*s in between
+            capture it in turn when they load it to create the closure."""
         alias = self.getAlias(sym)
         if alias is None:
             raise CompilerException("Unknown Local {0}".format(sym), None)
+        if (alias.depth < len(self.closures)
+            and isinstance(alias, (FnArgument, RenamedLocal, Closure))):
+            tag = alias.tag
+            alias = Closure(sym)
+            alias.tag = tag
+            self.pushAlias(sym, alias)
+            self.closures[-1].append(alias)
         return alias.compile(self)
 
+    def pushClosures(self):
+        """ Starts the compilation of a fn*, see compileAlias. """
+        self.closures.append([])
+
+    def popClosures(self):
+        """ Ends the compilation of a fn*, removing its Closures. """
+        for x in reversed(self.closures.pop()):
+            self.popAlias(x.sym)
+
     def closureList(self):
-        closures = []
-        for x in self.aliases:
-            alias = self.aliases[x]
-            if isinstance(alias, Closure) and alias.isUsed():
-                closures.append(alias)
-        return closures
+        """ Returns the Closures used by the fn* being compiled. """
+        if not self.closures:
+            return []
+        return [x for x in self.closures[-1] if x.isUsed()]
 
     def compile(self, itm):
         try:
@@ -1445,25 +2066,36 @@ class Compiler(object):
         return self.ns
 
     def executeCode(self, code, ns=None):
+        ns = ns or self.getNS()
+        c = self.assemble(code, ns)
+        if c is None:
+            return None
+        return self.executeCodeObject(c, ns)
+
+    def assemble(self, code, ns=None):
+        """Turns the code list of a top-level form into a code object.
+
+        None is returned if there is no code to run.
+        """
         ns = ns or self.getNS()
         if code == []:
             return None
         newcode = expandMetas(code, self)
         newcode.append((RETURN_VALUE, None))
+        newcode = optimize(newcode)
         c = Code(newcode, [], [], False, False, False,
                  str(Symbol(ns.__name__, "<string>")), self.filename, 0, None)
         try:
-            c = c.to_code()
+            return c.to_code()
         except:
             for x in newcode:
                 print x
             raise
 
-        # work on .cljs
-        #from clojure.util.freeze import write, read
-        #with open("foo.cljs", "wb") as fl:
-        #    f = write(c, fl)
-
+    def executeCodeObject(self, c, ns=None):
+        """Runs the code object of a top-level form in a namespace.
+        """
+        ns = ns or self.getNS()
         with threadBindings({self._NS_: ns}):
             retval = eval(c, ns.__dict__)
         return retval
@@ -1490,16 +2122,3 @@ class Compiler(object):
             (LOAD_CONST, None),
             (IMPORT_NAME, "clojure.standardimports"),
             (IMPORT_STAR, None)]
-
-    def executeModule(self, code):
-        code.append((RETURN_VALUE, None))
-        c = Code(code, [], [], False, False, False,
-                 str(Symbol(self.getNS().__name__, "<string>")), self.filename, 0, None)
-
-        dis.dis(c)
-        codeobject = c.to_code()
-
-        with open('output.pyc', 'wb') as fc:
-            fc.write(py_compile.MAGIC)
-            py_compile.wr_long(fc, long(time.time()))
-            marshal.dump(c, fc)
@@ -7,6 +7,8 @@ import clojure.lang.rt as RT
 
 
 class Cons(ASeq):
+    __slots__ = ("_meta", "_first", "_more")
+
     def __init__(self, *args):
         """Instantiate a Cons.
 
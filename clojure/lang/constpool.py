@@ -0,0 +1,274 @@
+"""Relocatable constants for the code objects built by the compiler.
+
+The compiler loads Vars, the values of static Vars, modules, compiled fns and
+literal data with LOAD_CONST, so the code objects it builds hold live objects
+that cannot be marshalled. relocate() replaces each of these constants by a
+marshallable reference: a namespace and a name, or a serialized literal.
+resolve() turns the references back into live objects, once, when the code
+object is loaded; the resolved code uses plain LOAD_CONSTs again.
+
+References are tuples starting with REF_MARKER, followed by their kind and
+arguments. Where a constant comes from matters for some kinds (a static Var's
+value must be looked up again, not copied), so the compiler records the
+origin of such constants while compiling a top-level form; see
+Compiler.setRelocatable.
+"""
+
+import fractions
+import marshal
+import re
+import sys
+import types
+
+from clojure.lang.cljexceptions import RelocationException
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.compiler import Compiler, arityFn, multiArityFn
+from clojure.lang.cons import Cons
+from clojure.lang.ipersistentvector import IPersistentVector
+from clojure.lang.iseq import ISeq
+from clojure.lang.namespace import Namespace, intern
+from clojure.lang.persistentarraymap import PersistentArrayMap
+from clojure.lang.persistenthashmap import PersistentHashMap
+import clojure.lang.persistenthashset as persistenthashset
+from clojure.lang.persistenthashset import PersistentHashSet
+from clojure.lang.persistentlist import PersistentList, EmptyList
+from clojure.lang.persistentvector import PersistentVector
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+from clojure.lang.var import Var
+
+
+REF_MARKER = "<clojure-py const ref>"
+
+_regexType = type(re.compile(""))
+
+
+def relocate(code, refs=None):
+    """Returns a copy of code whose constants can all be marshalled.
+
+    refs maps the ids of constants to (constant, kind, args...) tuples, as
+    recorded by the compiler. RelocationException is raised if a constant
+    cannot be turned into a reference.
+    """
+    refs = refs or {}
+    consts = tuple(_encode(c, refs) for c in code.co_consts)
+    return _replaceConsts(code, consts)
+
+
+def resolve(code, comp):
+    """Returns a copy of a relocated code object with live constants.
+
+    comp is the compiler references to the compiler are resolved to.
+    """
+    consts = tuple(_decode(c, comp) for c in code.co_consts)
+    return _replaceConsts(code, consts)
+
+
+def isRef(obj):
+    return type(obj) is tuple and len(obj) > 1 and obj[0] == REF_MARKER
+
+
+def _replaceConsts(code, consts):
+    if all(x is y for x, y in zip(consts, code.co_consts)):
+        return code
+    return types.CodeType(code.co_argcount, code.co_nlocals,
+                          code.co_stacksize, code.co_flags, code.co_code,
+                          consts, code.co_names, code.co_varnames,
+                          code.co_filename, code.co_name,
+                          code.co_firstlineno, code.co_lnotab,
+                          code.co_freevars, code.co_cellvars)
+
+
+def _ref(kind, *args):
+    return (REF_MARKER, kind) + args
+
+
+def _marshallable(obj):
+    try:
+        marshal.dumps(obj)
+    except ValueError:
+        return False
+    return True
+
+
+def _findGlobal(obj):
+    """Returns the module and name an object can be found at, or None.
+    """
+    modname = getattr(obj, "__module__", None)
+    name = getattr(obj, "__name__", None)
+    mod = sys.modules.get(modname) if isinstance(modname, str) else None
+    if isinstance(name, str) and getattr(mod, name, None) is obj:
+        return modname, name
+    return None
+
+
+def _encode(obj, refs):
+    if isinstance(obj, types.CodeType):
+        return relocate(obj, refs)
+    if _marshallable(obj):
+        return obj
+
+    entry = refs.get(id(obj))
+    if entry is not None and entry[0] is obj:
+        kind, args = entry[1], entry[2:]
+        if kind == "fn":
+            args = (relocate(obj.func_code, refs),
+                    obj.func_globals["__name__"], obj.func_name, obj.__doc__)
+        elif kind == "multifn":
+            args += (obj.__doc__,)
+        return _ref(kind, *(_encode(x, refs) for x in args))
+
+    if isinstance(obj, Var):
+        if obj.ns is None:
+            raise RelocationException("anonymous Var", obj)
+        return _ref("var", obj.ns.__name__, RT.name(obj.sym))
+    if isinstance(obj, types.ModuleType):
+        return _ref("module", obj.__name__)
+    if isinstance(obj, Compiler):
+        return _ref("compiler")
+    location = _findGlobal(obj)
+    if location is not None:
+        return _ref("global", *location)
+
+    encoder = _literalEncoders.get(type(obj))
+    if encoder is not None:
+        return encoder(obj, refs)
+    # Other seqs and vectors (mostly in metadata, e.g. :arglists) are read
+    # back as lists and vectors.
+    if isinstance(obj, ISeq):
+        return _encodeList(obj, refs)
+    if isinstance(obj, IPersistentVector):
+        return _encodeVector(obj, refs)
+    raise RelocationException("no reference for constant", obj)
+
+
+def _decode(obj, comp):
+    if isinstance(obj, types.CodeType):
+        return resolve(obj, comp)
+    if not isRef(obj):
+        return obj
+    return _decoders[obj[1]](comp, *(_decode(x, comp) for x in obj[2:]))
+
+
+def _encodeMeta(obj, refs):
+    return _encode(getattr(obj, "meta", lambda: None)(), refs)
+
+
+def _encodeItems(items, refs):
+    return _ref("tuple", *(_encode(x, refs) for x in items))
+
+
+def _encodeSeq(coll, refs):
+    return _encodeItems(RT.seqToTuple(RT.seq(coll)), refs)
+
+
+def _encodeList(obj, refs):
+    return _ref("list", _encodeSeq(obj, refs), _encodeMeta(obj, refs))
+
+
+def _encodeVector(obj, refs):
+    return _ref("vector", _encodeSeq(obj, refs), _encodeMeta(obj, refs))
+
+
+def _encodeCons(obj, refs):
+    items = []
+    s = obj
+    while isinstance(s, Cons):
+        items.append(_ref("tuple", _encode(s._first, refs),
+                          _encodeMeta(s, refs)))
+        s = s._more
+    return _ref("cons", _ref("tuple", *items), _encode(s, refs))
+
+
+def _encodeMap(obj, refs):
+    kvs = []
+    for entry in RT.seqToTuple(RT.seq(obj)):
+        kvs.append(_encode(entry.getKey(), refs))
+        kvs.append(_encode(entry.getValue(), refs))
+    kind = "arraymap" if isinstance(obj, PersistentArrayMap) else "map"
+    return _ref(kind, _ref("tuple", *kvs), _encodeMeta(obj, refs))
+
+
+_literalEncoders = {
+    Symbol: lambda obj, refs: _ref("symbol", obj.ns, obj.name,
+                                   _encodeMeta(obj, refs)),
+    Keyword: lambda obj, refs: _ref("keyword", obj.sym.ns, obj.sym.name),
+    PersistentList: _encodeList,
+    EmptyList: _encodeList,
+    Cons: _encodeCons,
+    PersistentVector: _encodeVector,
+    PersistentHashMap: _encodeMap,
+    PersistentArrayMap: _encodeMap,
+    PersistentHashSet: lambda obj, refs: _ref("set", _encodeSeq(obj, refs),
+                                              _encodeMeta(obj, refs)),
+    tuple: _encodeItems,
+    fractions.Fraction: lambda obj, refs: _ref("fraction", obj.numerator,
+                                               obj.denominator),
+    _regexType: lambda obj, refs: _ref("regex", obj.pattern, obj.flags),
+    }
+
+
+def _withMeta(obj, meta):
+    return obj.withMeta(meta) if meta is not None else obj
+
+
+def _findModule(name):
+    if name not in sys.modules:
+        __import__(name)
+    return sys.modules[name]
+
+
+def _decodeDef(comp, ns, name, meta):
+    v = intern(Namespace(ns), Symbol(None, name))
+    v.setDynamic(True)
+    v.setMeta(meta)
+    return v
+
+
+def _decodeFn(comp, code, ns, name, doc):
+    fn = types.FunctionType(code, Namespace(ns).__dict__, name)
+    fn.__doc__ = doc
+    return fn
+
+
+def _decodeMultiFn(comp, ns, name, arities, variadic, doc):
+    fn = multiArityFn(ns, name, arities, variadic)
+    fn.__doc__ = doc
+    return fn
+
+
+def _decodeArity(comp, ns, name, nargs):
+    fn = getattr(_findModule(ns), name).deref()
+    return arityFn(fn, nargs) or fn
+
+
+def _decodeCons(comp, items, tail):
+    s = tail
+    for first, meta in reversed(items):
+        s = Cons(meta, first, s)
+    return s
+
+
+_decoders = {
+    "deref": lambda comp, ns, name: getattr(_findModule(ns), name).deref(),
+    "def": _decodeDef,
+    "fn": _decodeFn,
+    "multifn": _decodeMultiFn,
+    "arity": _decodeArity,
+    "var": lambda comp, ns, name: getattr(_findModule(ns), name),
+    "module": lambda comp, name: _findModule(name),
+    "compiler": lambda comp: comp,
+    "global": lambda comp, ns, name: getattr(_findModule(ns), name),
+    "symbol": lambda comp, ns, name, meta: Symbol(meta, ns, name),
+    "keyword": lambda comp, ns, name: Keyword(Symbol(ns, name)),
+    "list": lambda comp, items, meta: _withMeta(RT.list(*items), meta),
+    "cons": _decodeCons,
+    "vector": lambda comp, items, meta: _withMeta(RT.vector(*items), meta),
+    "map": lambda comp, kvs, meta: _withMeta(RT.map(*kvs), meta),
+    "arraymap": lambda comp, kvs, meta: PersistentArrayMap(meta, list(kvs)),
+    "set": lambda comp, items, meta: _withMeta(
+        persistenthashset.create(items), meta),
+    "tuple": lambda comp, *items: items,
+    "fraction": lambda comp, num, den: fractions.Fraction(num, den),
+    "regex": lambda comp, pattern, flags: re.compile(pattern, flags),
+    }
@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class Counted(object):
+    __slots__ = ()
+
     def __len__(self):
         raise AbstractMethodCall(self)
\ No newline at end of file
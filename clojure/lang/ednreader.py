@@ -0,0 +1,447 @@
+"""A reader for edn (https://github.com/edn-format/edn), the data subset of the
+clojure-py syntax.
+
+Unlike lispreader, it only ever builds data: there is no syntax quote,
+unquote, #(), %, #', @, regex literal or ::keyword, symbols are not resolved
+and no :line metadata is attached. A tagged literal #tag form is handed to
+the function read for tag (see EdnReader).
+"""
+
+from array import array
+import datetime
+import marshal
+import mmap
+import os
+import re
+import uuid
+
+from clojure.lang.bytecodecache import writeMarshalled
+from clojure.lang.cljexceptions import ReaderException
+from clojure.lang.cljkeyword import Keyword, TAG_KEY, T
+from clojure.lang.fileseq import FileReader, StringReader
+from clojure.lang.ipersistentmap import IPersistentMap
+from clojure.lang.lispreader import (INTERPRET_TOKENS, characterReader,
+                                     commentReader, matchSymbol, read1,
+                                     readNumber, readSkipping, readToken,
+                                     stringReader)
+from clojure.lang.persistenthashset import createWithCheck
+from clojure.lang.persistentlist import EMPTY as EMPTY_LIST, PersistentList
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+
+EOF = object()
+
+# How many interpreted tokens an EdnReader remembers.
+TOKEN_CACHE_SIZE = 4096
+
+# The index of the forms of an edn file is written next to it, under its name
+# followed by INDEX_SUFFIX (see IndexedEdnFile).
+INDEX_SUFFIX = ".ednidx"
+INDEX_MAGIC = "clojure-py edn index"
+
+instPat = re.compile(r"""
+(?P<date>\d{4}-\d{2}-\d{2})
+(?:T(?P<time>\d{2}:\d{2}:\d{2})(?:\.(?P<frac>\d+))?)?
+(?:(?P<utc>Z)|(?P<sign>[+-])(?P<hours>\d{2}):(?P<minutes>\d{2}))?
+$
+""", re.X)
+
+
+def readInst(s):
+    """Return the naive UTC datetime of the RFC 3339 timestamp s."""
+    mo = instPat.match(s) if isinstance(s, basestring) else None
+    if mo is None:
+        raise ReaderException("Invalid #inst timestamp: {0!r}".format(s))
+    try:
+        ret = datetime.datetime.strptime(
+            "{0}T{1}".format(mo.group("date"), mo.group("time") or "00:00:00"),
+            "%Y-%m-%dT%H:%M:%S")
+    except ValueError as e:
+        raise ReaderException("Invalid #inst timestamp: {0!r}".format(s))
+    if mo.group("frac"):
+        ret = ret.replace(microsecond=int(mo.group("frac")[:6].ljust(6, "0")))
+    if mo.group("sign"):
+        offset = datetime.timedelta(hours=int(mo.group("hours")),
+                                    minutes=int(mo.group("minutes")))
+        ret = ret - offset if mo.group("sign") == "+" else ret + offset
+    return ret
+
+
+def readUUID(s):
+    """Return the uuid.UUID written as the string s."""
+    try:
+        return uuid.UUID(s)
+    except (TypeError, ValueError, AttributeError):
+        raise ReaderException("Invalid #uuid: {0!r}".format(s))
+
+
+defaultReaders = {Symbol("inst"): readInst,
+                  Symbol("uuid"): readUUID,
+                  }
+
+
+def interpretToken(s):
+    """Return the value defined by the string s, without resolving anything.
+
+    Raise ReaderException if s is not a valid edn token."""
+    if s in INTERPRET_TOKENS:
+        return INTERPRET_TOKENS[s]
+    ret = matchSymbol(s) if not s.startswith("::") else None
+    if ret is None:
+        raise ReaderException("Invalid token: {0}".format(s))
+    return ret
+
+
+def createList(items):
+    """Return a PersistentList of the items of the Python list items, built
+    node by node instead of with repeated conses."""
+    ret = None
+    for n, x in enumerate(reversed(items), 1):
+        ret = PersistentList(None, x, ret, n)
+    return EMPTY_LIST if ret is None else ret
+
+
+class EdnReader(object):
+    """Reads edn forms.
+
+    readers -- a map (or dict) of tag Symbols to functions of one argument,
+               used on top of the defaults for #inst and #uuid
+    default -- a function of the tag Symbol and the form, called for the tags
+               with no reader; if None, such tags raise ReaderException"""
+    def __init__(self, readers=None, default=None):
+        self.readers = dict(defaultReaders)
+        if isinstance(readers, IPersistentMap):
+            for entry in RT.seqToTuple(RT.seq(readers)):
+                self.readers[entry.getKey()] = entry.getValue()
+        elif readers is not None:
+            self.readers.update(readers)
+        self.default = default
+        # keywords and symbols are immutable, and tend to repeat in data
+        self.tokens = {}
+
+    def interpretToken(self, s):
+        ret = self.tokens.get(s, EOF)
+        if ret is EOF:
+            if len(self.tokens) >= TOKEN_CACHE_SIZE:
+                self.tokens.clear()
+            ret = self.tokens[s] = interpretToken(s)
+        return ret
+
+    def read(self, rdr, eofIsError, eofValue):
+        """Read and return one form from rdr.
+
+        rdr -- a read/unread-able object
+        eofIsError -- if True, raise an exception when rdr is out of
+                      characters if False, return eofValue instead"""
+        while True:
+            ch = readSkipping(rdr)
+            if ch == "":
+                if eofIsError:
+                    raise ReaderException("EOF while reading", rdr)
+                return eofValue
+            if ch.isdigit():
+                return readNumber(rdr, ch)
+            m = macros.get(ch)
+            if m is not None:
+                ret = m(self, rdr, ch)
+                if ret is rdr:
+                    continue
+                return ret
+            if ch in ["+", "-"]:
+                ch2 = read1(rdr)
+                rdr.back()
+                if ch2.isdigit():
+                    return readNumber(rdr, ch)
+            return self.interpretToken(readToken(rdr, ch))
+
+    def readString(self, s):
+        """Return the first form found in the string s, or None if there is
+        none."""
+        return self.read(StringReader(s), False, None)
+
+    def readDelimitedList(self, delim, rdr):
+        """Read forms until an unmatched delim is reached. Return a Python
+        list of those forms."""
+        a = []
+        while True:
+            ch = readSkipping(rdr)
+            if ch == delim:
+                return a
+            if ch == "":
+                raise ReaderException("EOF while reading a collection", rdr)
+            if ch.isdigit():
+                a.append(readNumber(rdr, ch))
+                continue
+            m = macros.get(ch)
+            if m is not None:
+                ret = m(self, rdr, ch)
+                if ret is not rdr:
+                    a.append(ret)
+            else:
+                rdr.back()
+                a.append(self.read(rdr, True, None))
+
+    def readTagged(self, rdr):
+        """Read a #tag form tagged literal, the # having been read."""
+        tag = self.read(rdr, True, None)
+        if not isinstance(tag, Symbol):
+            raise ReaderException("Reader tag must be a symbol", rdr)
+        form = self.read(rdr, True, None)
+        fn = self.readers.get(tag)
+        if fn is not None:
+            return fn(form)
+        if self.default is not None:
+            return self.default(tag, form)
+        raise ReaderException("No reader function for tag {0}".format(tag),
+                              rdr)
+
+
+def readSeq(fl, readers=None, default=None):
+    """Yield the edn forms of a file one at a time.
+
+    fl -- a path, or a file object open for reading
+
+    The file is read in chunks as forms are yielded; only the current chunk
+    is held in memory."""
+    if isinstance(fl, basestring):
+        with open(fl) as f:
+            for form in readSeq(f, readers, default):
+                yield form
+        return
+    edn = EdnReader(readers, default)
+    rdr = FileReader(fl)
+    while True:
+        form = edn.read(rdr, False, EOF)
+        if form is EOF:
+            return
+        yield form
+
+
+def readString(s, readers=None, default=None):
+    """Return the first edn form found in the string s, or None."""
+    return EdnReader(readers, default).readString(s)
+
+
+def readAll(s, readers=None, default=None):
+    """Return a Python list of all the edn forms found in the string s."""
+    edn = EdnReader(readers, default)
+    rdr = StringReader(s)
+    forms = []
+    while True:
+        form = edn.read(rdr, False, EOF)
+        if form is EOF:
+            return forms
+        forms.append(form)
+
+
+def splitLines(fl, chunksize):
+    """Return the (start, end) offsets of consecutive chunks of about
+    chunksize bytes covering the file fl, each ending right after a newline
+    or at the end of the file."""
+    fl.seek(0, 2)
+    size = fl.tell()
+    chunks = []
+    start = 0
+    while start < size:
+        fl.seek(min(start + chunksize, size))
+        fl.readline()
+        end = min(fl.tell(), size)
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def _readChunk(args):
+    path, start, end, readers, default = args
+    with open(path, "rb") as fl:
+        fl.seek(start)
+        return readAll(fl.read(end - start), readers, default)
+
+
+def readParallel(path, processes=None, chunksize=1 << 20, readers=None,
+                 default=None):
+    """Yield the edn forms of the file at path in order, read by a pool of
+    processes.
+
+    processes -- the size of the pool, defaults to the number of CPUs
+    chunksize -- roughly how many bytes each process reads at a time
+
+    The file is split on newlines (see splitLines) and the chunks are read
+    independently, so no form may span the newline ending a chunk: this is
+    meant for files with one top-level form per line. readers and default
+    are sent to the processes, so they must be picklable. The forms are sent
+    back pickled."""
+    import multiprocessing
+    with open(path, "rb") as fl:
+        chunks = splitLines(fl, chunksize)
+    pool = multiprocessing.Pool(processes)
+    try:
+        for forms in pool.imap(_readChunk, [(path, start, end, readers, default)
+                                            for start, end in chunks]):
+            for form in forms:
+                yield form
+        pool.close()
+    finally:
+        pool.terminate()
+
+
+def indexForms(fl, edn=None):
+    """Return an array of the offsets at which the top-level edn forms of
+    the file fl start.
+
+    An offset may point at discarded #_ forms preceding its form; reading
+    from there still returns that form."""
+    edn = edn or EdnReader()
+    rdr = FileReader(fl)
+    offsets = array("l")
+    while True:
+        if readSkipping(rdr) == "":
+            return offsets
+        rdr.back()
+        start = rdr.tell()
+        if edn.read(rdr, False, EOF) is not EOF:
+            offsets.append(start)
+
+
+def readIndex(path, stamp):
+    """Return the offsets stored in the index at path, or None if there is
+    no index or if it was written for another stamp."""
+    try:
+        with open(path, "rb") as fl:
+            if marshal.load(fl) != stamp:
+                return None
+            offsets = array("l")
+            offsets.fromstring(marshal.load(fl))
+            return offsets
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+class IndexedEdnFile(object):
+    """Random access to the top-level forms of an edn file.
+
+    The file is memory-mapped, and the offsets of its forms are taken from
+    the index next to it (see INDEX_SUFFIX), or found by reading the file
+    once and then written there. Getting form i only parses that form. The
+    index is rebuilt when the mtime or the size of the file change.
+
+    readers and default are as for EdnReader."""
+    def __init__(self, path, readers=None, default=None):
+        self.path = path
+        self.edn = EdnReader(readers, default)
+        with open(path, "rb") as fl:
+            st = os.fstat(fl.fileno())
+            # an empty file cannot be mapped
+            self.data = (mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+                         if st.st_size else "")
+            stamp = (INDEX_MAGIC, st.st_mtime, st.st_size)
+            self.offsets = readIndex(path + INDEX_SUFFIX, stamp)
+            if self.offsets is None:
+                self.offsets = indexForms(fl, self.edn)
+                writeMarshalled(path + INDEX_SUFFIX, stamp,
+                                self.offsets.tostring())
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        n = len(self.offsets)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("edn form index out of range")
+        end = self.offsets[i + 1] if i + 1 < n else len(self.data)
+        return self.edn.readString(self.data[self.offsets[i]:end])
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def listReader(edn, rdr, leftparen):
+    return createList(edn.readDelimitedList(")", rdr))
+
+
+def vectorReader(edn, rdr, leftbracket):
+    return RT.vector(*edn.readDelimitedList("]", rdr))
+
+
+def mapReader(edn, rdr, leftbrace):
+    kvs = edn.readDelimitedList("}", rdr)
+    if len(kvs) % 2:
+        raise ReaderException("Map literal must contain an even number of"
+                              " forms", rdr)
+    ret = RT.map(*kvs)
+    if len(ret) != len(kvs) // 2:
+        raise ReaderException("Duplicate key in map literal", rdr)
+    return ret
+
+
+def setReader(edn, rdr, leftbrace):
+    try:
+        return createWithCheck(edn.readDelimitedList("}", rdr))
+    except Exception as e:
+        raise ReaderException(str(e), rdr)
+
+
+def discardReader(edn, rdr, underscore):
+    edn.read(rdr, True, None)
+    return rdr
+
+
+def metaReader(edn, rdr, caret):
+    meta = edn.read(rdr, True, None)
+    if isinstance(meta, (str, Symbol)):
+        meta = RT.map(TAG_KEY, meta)
+    elif isinstance(meta, Keyword):
+        meta = RT.map(meta, T)
+    elif not isinstance(meta, IPersistentMap):
+        raise ReaderException("Metadata must be Symbol,Keyword,String or Map",
+                              rdr)
+    o = edn.read(rdr, True, None)
+    if not hasattr(o, "withMeta"):
+        raise ReaderException("Cannot attach meta to a object without"
+                              " .withMeta", rdr)
+    return o.withMeta(meta)
+
+
+def dispatchReader(edn, rdr, hash):
+    ch = read1(rdr)
+    if ch == "":
+        raise ReaderException("EOF while reading character", rdr)
+    if ch in dispatchMacros:
+        return dispatchMacros[ch](edn, rdr, ch)
+    rdr.back()
+    return edn.readTagged(rdr)
+
+
+def unmatchedClosingDelimiterReader(edn, rdr, un):
+    raise ReaderException("Unmatched delimiter {0}".format(un), rdr)
+
+
+def notEdnReader(edn, rdr, ch):
+    raise ReaderException("{0} is not valid edn".format(ch), rdr)
+
+
+macros = {'"': lambda edn, rdr, ch: stringReader(rdr, ch),
+          "(": listReader,
+          ")": unmatchedClosingDelimiterReader,
+          "[": vectorReader,
+          "]": unmatchedClosingDelimiterReader,
+          "{": mapReader,
+          "}": unmatchedClosingDelimiterReader,
+          ";": lambda edn, rdr, ch: commentReader(rdr, ch),
+          "#": dispatchReader,
+          "^": metaReader,
+          "\\": lambda edn, rdr, ch: characterReader(rdr, ch),
+          "`": notEdnReader,
+          "~": notEdnReader,
+          "@": notEdnReader,
+          "%": notEdnReader,
+          }
+
+dispatchMacros = {"{": setReader,
+                  "!": lambda edn, rdr, ch: commentReader(rdr, ch),
+                  "_": discardReader,
+                  }
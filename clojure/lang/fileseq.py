@@ -108,28 +108,46 @@ class MutatableFileSeq(ASeq):
 
 
 class StringReader(object):
+    """Reads a string one character at a time, or a whole regex match at a
+    time (see readMatch).
+
+    Lines are not tracked as characters are read, but counted when lineCol is
+    called, from where it was last called.
+    """
     def __init__(self, s):
-        self.line = 1;
-        self.col = 1
         self.idx = -1
         self.s = s
-        self.lastline = -1
-        self.lastcol = -1
         self.haslast = False
+        # idx, line and index of the last newline at the last call to lineCol()
+        self.lineidx = -1
+        self.line = 1
+        self.linestart = -1
 
     def read(self):
-        self.lastcol = self.col
-        self.lastline = self.line
         self.haslast = True
         self.idx += 1
         if self.idx >= len(self.s):
             return ""
+        return self.s[self.idx]
 
-        cc = self.s[self.idx]
-        if cc == '\n':
-            self.line += 1;
-            self.col = 1
-        return cc
+    def tell(self):
+        """Returns the offset of the next character to be read."""
+        return self.idx + 1
+
+    def readMatch(self, pat):
+        """Consumes the match of the compiled regex pat starting right after
+        the current character and returns the matched string ("" if pat does
+        not match).
+        """
+        start = self.idx + 1
+        if start >= len(self.s):
+            return ""
+        m = pat.match(self.s, start)
+        if m is None or m.end() == start:
+            return ""
+        self.idx = m.end() - 1
+        self.haslast = False
+        return m.group()
 
     def next(self):
         self.read()
@@ -139,12 +157,78 @@ class StringReader(object):
         return self.s[self.idx] if self.idx < len(self.s) else ""
 
     def lineCol(self):
-        return [self.line, self.col]
+        idx = self.idx if self.idx < len(self.s) else len(self.s) - 1
+        if idx >= self.lineidx:
+            n = self.s.count("\n", self.lineidx + 1, idx + 1)
+            if n:
+                self.line += n
+                self.linestart = self.s.rfind("\n", self.lineidx + 1, idx + 1)
+        else:
+            self.line -= self.s.count("\n", idx + 1, self.lineidx + 1)
+            if self.linestart > idx:
+                self.linestart = self.s.rfind("\n", 0, idx + 1)
+        self.lineidx = idx
+        return [self.line, max(idx - self.linestart, 1)]
 
     def back(self):
         if not self.haslast:
             raise IllegalAccessError()
         self.idx -= 1
         self.haslast = False
-        self.line = self.lastline
-        self.col = self.lastcol
+
+
+class FileReader(StringReader):
+    """Reads a file like StringReader reads a string, but only holds a window
+    of it in memory: the window is refilled, and what has already been read
+    dropped, as reading goes past its end.
+    """
+    def __init__(self, fl, bufsize=1 << 16):
+        StringReader.__init__(self, "")
+        self.fl = fl
+        self.bufsize = bufsize
+        self.eof = False
+        # how many characters of the file were dropped from the window
+        self.offset = 0
+
+    def fill(self):
+        """Reads the next chunk of the file into the window. Returns False at
+        the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.fl.read(self.bufsize)
+        if not chunk:
+            self.eof = True
+            return False
+        # Keep the current character, and the one before it for back().
+        drop = max(self.idx - 1, 0)
+        self.lineCol()
+        self.lineidx -= drop
+        self.linestart -= drop
+        self.idx -= drop
+        self.offset += drop
+        self.s = self.s[drop:] + chunk
+        return True
+
+    def tell(self):
+        return self.offset + self.idx + 1
+
+    def read(self):
+        if self.idx + 1 >= len(self.s):
+            self.fill()
+        return StringReader.read(self)
+
+    def readMatch(self, pat):
+        # Matches that run to the end of the window may go on in the file.
+        while True:
+            if self.idx + 1 >= len(self.s) and not self.fill():
+                return ""
+            start = self.idx + 1
+            m = pat.match(self.s, start)
+            if m is None or m.end() < len(self.s) or not self.fill():
+                break
+        if m is None or m.end() == start:
+            return ""
+        self.idx = m.end() - 1
+        self.haslast = False
+        return m.group()
@@ -0,0 +1,14 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.indexed import Indexed
+
+class IChunk(Indexed):
+    __slots__ = ()
+
+    def dropFirst(self):
+        """Return a chunk of all but the first item of this one."""
+        raise AbstractMethodCall(self)
+
+    def reduce(self, f, start):
+        """Return the result of reducing f over the items of this chunk,
+        starting from start."""
+        raise AbstractMethodCall(self)
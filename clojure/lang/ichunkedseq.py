@@ -0,0 +1,18 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.iseq import ISeq
+from clojure.lang.sequential import Sequential
+
+class IChunkedSeq(Sequential, ISeq):
+    __slots__ = ()
+
+    def chunkedFirst(self):
+        """Return the first chunk (an IChunk) of the sequence."""
+        raise AbstractMethodCall(self)
+
+    def chunkedNext(self):
+        """Return the sequence after the first chunk or None."""
+        raise AbstractMethodCall(self)
+
+    def chunkedMore(self):
+        """Return the sequence after the first chunk or ()."""
+        raise AbstractMethodCall(self)
@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class IHashEq(object):
+    __slots__ = ()
+
     def hasheq(self):
         raise AbstractMethodCall(self)
\ No newline at end of file
@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class ILookup(object):
+    __slots__ = ()
+
     def valAt(self, key, notFound=None):
         raise AbstractMethodCall(self)
@@ -3,6 +3,8 @@ from clojure.lang.counted import Counted
 
 
 class IndexableSeq(ASeq, Counted):
+    __slots__ = ("array", "i")
+
     def __init__(self, array, i):
         self.array = array
         self.i = i
@@ -3,5 +3,7 @@ from clojure.lang.counted import Counted
 
 
 class Indexed(Counted):
+    __slots__ = ()
+
     def nth(self, i, notFound = None):
         raise AbstractMethodCall(self)
@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class IObj(object):
+    __slots__ = ()
+
     def withMeta(self, meta):
         raise AbstractMethodCall(self)
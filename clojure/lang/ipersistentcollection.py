@@ -2,6 +2,8 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 from clojure.lang.seqable import Seqable
 
 class IPersistentCollection(Seqable):
+    __slots__ = ()
+
     def count(self):
         raise AbstractMethodCall(self)
 
@@ -2,6 +2,8 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 from clojure.lang.ipersistentcollection import IPersistentCollection
 
 class IPersistentStack(IPersistentCollection):
+    __slots__ = ()
+
     def peek(self):
         raise AbstractMethodCall(self)
 
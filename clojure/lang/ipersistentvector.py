@@ -7,6 +7,8 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 
 
 class IPersistentVector(Associative, Sequential, IPersistentStack, Reversible, Indexed):
+    __slots__ = ()
+
     def __len__(self):
         raise AbstractMethodCall(self)
 
@@ -16,6 +16,7 @@ class IPrintable(object):
     * Don't pretty-print to the writer
     * Don't write leading or trailing white space
       (including a trailing newline)"""
+    __slots__ = ()
 
     def writeAsString(self, writer):
         """Write a user-friendly string to writer.
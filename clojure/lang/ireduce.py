@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class IReduce(object):
+    __slots__ = ()
+
     def reduce(self, *args):
         raise AbstractMethodCall(self)
@@ -2,6 +2,8 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 from clojure.lang.ipersistentcollection import IPersistentCollection
 
 class ISeq(IPersistentCollection):
+    __slots__ = ()
+
     def first(self):
         """Return the first item in the collection or None if it's empty."""
         raise AbstractMethodCall(self)
@@ -1,5 +1,7 @@
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 class Iterable(object):
+    __slots__ = ()
+
     def __iter__(self):
         raise AbstractMethodCall(self)
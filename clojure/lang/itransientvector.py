@@ -0,0 +1,10 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.itransientassociative import ITransientAssociative
+from clojure.lang.indexed import Indexed
+
+class ITransientVector(ITransientAssociative, Indexed):
+    def assocN(self, i, val):
+        raise AbstractMethodCall(self)
+
+    def pop(self):
+        raise AbstractMethodCall(self)
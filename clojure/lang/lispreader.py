@@ -138,6 +138,22 @@ def read1(rdr):
     return rdr.first()
 
 
+def readSkipping(rdr):
+    """Return the next character from rdr that is not white space, skipping
+    ; comments.
+
+    Readers with a readMatch() method (see fileseq.StringReader) skip whole
+    runs of white space and comments at once."""
+    readMatch = getattr(rdr, "readMatch", None)
+    if readMatch is not None:
+        readMatch(skipPat)
+        return rdr.read()
+    ch = read1(rdr)
+    while ch in whiteSpace:
+        ch = read1(rdr)
+    return ch
+
+
 def isMacro(c):
     return c in macros
 
@@ -169,10 +185,7 @@ def read(rdr, eofIsError, eofValue, isRecursive):
     5. check for a number (with [+-])
     6. check for a symbol"""
     while True:
-        ch = read1(rdr)
-
-        while ch in whiteSpace:
-            ch = read1(rdr)
+        ch = readSkipping(rdr)
 
         if ch == "":
             if eofIsError:
@@ -328,8 +341,11 @@ def stringReader(rdr, doublequote):
 
     May raise ReaderException. Return a str or unicode object."""
     buf = []
-    ch = read1(rdr)
+    readMatch = getattr(rdr, "readMatch", None)
     while True:
+        if readMatch is not None:
+            buf.append(readMatch(stringCharsPat))
+        ch = read1(rdr)
         if ch == "":
             raise ReaderException("EOF while reading string")
         if ch == '\\':
@@ -358,7 +374,6 @@ def stringReader(rdr, doublequote):
         elif ch == '"':
             return "".join(buf)
         buf += ch
-        ch = read1(rdr)
 
 
 def readToken(rdr, initch):
@@ -369,6 +384,9 @@ def readToken(rdr, initch):
 
     Collect characters until the eof is reached, white space is read, or a
     terminating macro character is read."""
+    readMatch = getattr(rdr, "readMatch", None)
+    if readMatch is not None:
+        return initch + readMatch(tokenPat)
     sb = [initch]
     while True:
         ch = read1(rdr)
@@ -403,15 +421,18 @@ def readNumber(rdr, initch):
     initch -- the first character of the number
 
     May raise ReaderException."""
-    sb = [initch]
-    while True:
-        ch = read1(rdr)
-        if ch == "" or ch in whiteSpace or isMacro(ch):
-            rdr.back()
-            break
-        sb.append(ch)
-
-    s = "".join(sb)
+    readMatch = getattr(rdr, "readMatch", None)
+    if readMatch is not None:
+        s = initch + readMatch(numberPat)
+    else:
+        sb = [initch]
+        while True:
+            ch = read1(rdr)
+            if ch == "" or ch in whiteSpace or isMacro(ch):
+                rdr.back()
+                break
+            sb.append(ch)
+        s = "".join(sb)
     try:
         n = matchNumber(s)
     except Exception as e:
@@ -465,6 +486,9 @@ def commentReader(rdr, semicolon):
     semicolon -- ignored
 
     Return rdr"""
+    readMatch = getattr(rdr, "readMatch", None)
+    if readMatch is not None:
+        readMatch(commentPat)
     while True:
         ch = read1(rdr)
         if ch in commentTerminators:
@@ -575,9 +599,7 @@ def readDelimitedList(delim, rdr, isRecursive):
     a = []
 
     while True:
-        ch = read1(rdr)
-        while ch in whiteSpace:
-            ch = read1(rdr)
+        ch = readSkipping(rdr)
         if ch == "":
             raise ReaderException(
                 "EOF while reading starting at line {0}".format(firstline))
@@ -1074,3 +1096,15 @@ dispatchMacros = {"\"": regexReader,
                   "r": rawRegexReader,
                   "=": evalReaderNotImplemented, # temporary?
                   }
+
+# Patterns for readers with a readMatch() method, which consume whole tokens,
+# strings and runs of white space at once instead of reading each character.
+_whiteSpaceChars = "".join(whiteSpace)
+skipPat = re.compile(r"(?:[{0}]+|;[^\n\r]*)+".format(
+    re.escape(_whiteSpaceChars)))
+commentPat = re.compile(r"[^\n\r]*")
+stringCharsPat = re.compile(r'[^"\\]+')
+tokenPat = re.compile("[^{0}]*".format(re.escape(
+    _whiteSpaceChars + "".join(ch for ch in macros if isTerminatingMacro(ch)))))
+numberPat = re.compile("[^{0}]*".format(re.escape(
+    _whiteSpaceChars + "".join(macros))))
@@ -6,6 +6,8 @@ class MapEntry(AMapEntry):
 
     Contains the attributes _key and _value with associated getKey() and
     getValue() methods."""
+    __slots__ = ("_key", "_value")
+
     def __init__(self, key, value):
         """Instantiate a MapEntry.
 
@@ -1,4 +1,5 @@
 from clojure.lang.iobj import IObj
+from clojure.lang.slots import getState, setState
 from clojure.lang.cljexceptions import AbstractMethodCall
 
 
@@ -10,6 +11,10 @@ class Obj(IObj):
 
     This map does not change the identiy of the object. When two subclass
     instances are compared, their meta data should be disregarded."""
+    __slots__ = ()
+    __getstate__ = getState
+    __setstate__ = setState
+
     def meta(self):
         """Return a PersistentHashMap or None if no meta data attached."""
         return getattr(self, "_meta", None)
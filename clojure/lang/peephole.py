@@ -0,0 +1,206 @@
+"""Peephole optimization of the code lists built by the compiler.
+
+The code of nested special forms and macro expansions (an and is a let* and
+an if*) is redundant in ways no single form can see: jumps to jumps, code
+after a jump that nothing jumps to, values stored in a local only to be
+loaded right back, constants pushed only to be popped. optimize removes them
+from a code list (see clojure.util.byteplay) before it is assembled.
+"""
+
+from clojure.util.byteplay import Label, SetLineno, opmap
+
+
+def _opcodes(*names):
+    # some of the opcodes only exist in Python 2.7
+    return frozenset(opmap[name] for name in names if name in opmap)
+
+
+JUMP_ABSOLUTE = opmap["JUMP_ABSOLUTE"]
+JUMP_FORWARD = opmap["JUMP_FORWARD"]
+LOAD_CONST = opmap["LOAD_CONST"]
+LOAD_FAST = opmap["LOAD_FAST"]
+POP_TOP = opmap["POP_TOP"]
+RETURN_VALUE = opmap["RETURN_VALUE"]
+STORE_FAST = opmap["STORE_FAST"]
+
+# The opcodes after which the next instruction is only reached by a jump.
+_noFallThrough = _opcodes("RETURN_VALUE", "RAISE_VARARGS", "JUMP_ABSOLUTE",
+                          "JUMP_FORWARD")
+
+_unconditionalJumps = _opcodes("JUMP_ABSOLUTE", "JUMP_FORWARD")
+
+# The jumps that may be retargeted. They leave the block stack alone, unlike
+# SETUP_EXCEPT and the like, and their target is absolute (a JUMP_FORWARD
+# becomes a JUMP_ABSOLUTE when retargeted).
+_threadableJumps = _opcodes("JUMP_ABSOLUTE", "JUMP_FORWARD",
+                            "POP_JUMP_IF_FALSE", "POP_JUMP_IF_TRUE",
+                            "JUMP_IF_FALSE_OR_POP", "JUMP_IF_TRUE_OR_POP")
+
+# Maps (jump, jump at its target) pairs to the jump that can go directly
+# to the target of the second one: a JUMP_IF_FALSE_OR_POP to a
+# POP_JUMP_IF_FALSE jumps on a false value that is popped right away.
+_jumpsToJumps = dict(
+    ((opmap[first], opmap[second]), opmap[result])
+    for first, second, result in [
+        ("JUMP_IF_FALSE_OR_POP", "POP_JUMP_IF_FALSE", "POP_JUMP_IF_FALSE"),
+        ("JUMP_IF_FALSE_OR_POP", "JUMP_IF_FALSE_OR_POP",
+         "JUMP_IF_FALSE_OR_POP"),
+        ("JUMP_IF_TRUE_OR_POP", "POP_JUMP_IF_TRUE", "POP_JUMP_IF_TRUE"),
+        ("JUMP_IF_TRUE_OR_POP", "JUMP_IF_TRUE_OR_POP",
+         "JUMP_IF_TRUE_OR_POP")]
+    if first in opmap)
+
+_localOpcodes = _opcodes("LOAD_FAST", "STORE_FAST", "DELETE_FAST")
+
+
+def optimize(code):
+    """Returns an optimized copy of a code list.
+
+    The passes are repeated as long as one of them changes something, as
+    each can give the others more to do.
+    """
+    code = list(code)
+    while True:
+        newcode = code
+        for optimizePass in (threadJumps, removeDeadCode, removePairs,
+                             removeLinenos):
+            newcode = optimizePass(newcode)
+        if not changed(code, newcode):
+            return newcode
+        code = newcode
+
+
+def changed(code, newcode):
+    """Returns whether a pass changed a code list. The passes only build new
+    instructions for the ones they change."""
+    return (len(code) != len(newcode)
+            or any(x is not y for x, y in zip(code, newcode)))
+
+
+def labelPositions(code):
+    """Maps the ids of the labels of a code list to their positions (Labels
+    with the same name compare equal)."""
+    return dict((id(op), i) for i, (op, arg) in enumerate(code)
+                if type(op) is Label)
+
+
+def nextInstruction(code, i):
+    """Returns the position of the first opcode at or after position i,
+    skipping labels and line numbers, or None if there is none."""
+    while i < len(code):
+        op = code[i][0]
+        if type(op) is not Label and op is not SetLineno:
+            return i
+        i += 1
+    return None
+
+
+def threadJumps(code):
+    """Retargets the jumps to unconditional jumps (and the conditional jumps
+    of _jumpsToJumps) to the final target, and replaces the unconditional
+    jumps to a return by the return."""
+    positions = labelPositions(code)
+    newcode = []
+    for item in code:
+        op, arg = item
+        if op in _threadableJumps and id(arg) in positions:
+            target = arg
+            seen = set([id(target)])
+            while True:
+                i = nextInstruction(code, positions[id(target)])
+                if i is None:
+                    break
+                nextop, nextarg = code[i]
+                if id(nextarg) in seen or id(nextarg) not in positions:
+                    break
+                if (op, nextop) in _jumpsToJumps:
+                    op = _jumpsToJumps[op, nextop]
+                elif nextop not in _unconditionalJumps:
+                    break
+                target = nextarg
+                seen.add(id(target))
+            if (op in _unconditionalJumps and i is not None
+                and code[i][0] == RETURN_VALUE):
+                item = (RETURN_VALUE, None)
+            elif target is not arg:
+                if op == JUMP_FORWARD:
+                    op = JUMP_ABSOLUTE
+                item = (op, target)
+        newcode.append(item)
+    return newcode
+
+
+def removeDeadCode(code):
+    """Removes the labels nothing jumps to, the code that can only be
+    reached through them, and the unconditional jumps to the next
+    instruction. Line numbers are kept, see removeLinenos."""
+    referenced = set(id(arg) for op, arg in code if type(arg) is Label)
+    newcode = []
+    reachable = True
+    for i, item in enumerate(code):
+        op, arg = item
+        if type(op) is Label:
+            if id(op) not in referenced:
+                continue
+            reachable = True
+        elif op is SetLineno:
+            pass
+        elif not reachable:
+            continue
+        elif op in _unconditionalJumps and jumpsToNext(code, i):
+            continue
+        elif op in _noFallThrough:
+            reachable = False
+        newcode.append(item)
+    return newcode
+
+
+def jumpsToNext(code, i):
+    """Returns whether the jump at position i goes to the next opcode."""
+    target = code[i][1]
+    for op, arg in code[i + 1:]:
+        if op is target:
+            return True
+        if type(op) is not Label and op is not SetLineno:
+            return False
+    return False
+
+
+def removePairs(code):
+    """Removes the constants that are popped right away, and the values
+    stored in a local only to be loaded right back."""
+    uses = {}
+    for op, arg in code:
+        if op in _localOpcodes:
+            uses[arg] = uses.get(arg, 0) + 1
+    newcode = []
+    for item in code:
+        op, arg = item
+        if newcode:
+            lastop, lastarg = newcode[-1]
+            if op == POP_TOP and lastop == LOAD_CONST:
+                newcode.pop()
+                continue
+            if (op == LOAD_FAST and lastop == STORE_FAST and arg == lastarg
+                and uses[arg] == 2):
+                newcode.pop()
+                continue
+        newcode.append(item)
+    return newcode
+
+
+def removeLinenos(code):
+    """Removes the line numbers that are followed by another one, or that
+    are the same as the last one."""
+    newcode = []
+    lastline = None
+    for i, item in enumerate(code):
+        op, arg = item
+        if op is SetLineno:
+            if arg == lastline:
+                continue
+            if i + 1 < len(code) and code[i + 1][0] is SetLineno:
+                continue
+            lastline = arg
+        newcode.append(item)
+    return newcode
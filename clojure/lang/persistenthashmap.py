@@ -1,5 +1,9 @@
+from threading import currentThread
+
 from clojure.lang.apersistentmap import APersistentMap
-from clojure.lang.cljexceptions import ArityException, AbstractMethodCall
+from clojure.lang.atransientmap import ATransientMap
+from clojure.lang.cljexceptions import (ArityException, AbstractMethodCall,
+                                        IllegalAccessError)
 from clojure.lang.ieditablecollection import IEditableCollection
 from clojure.lang.iobj import IObj
 from clojure.lang.aseq import ASeq
@@ -7,6 +11,7 @@ from clojure.lang.util import bitCount, arrayCopy
 from clojure.lang.box import Box
 from clojure.lang.atomicreference import AtomicReference
 from clojure.lang.mapentry import MapEntry
+from clojure.lang.slots import getState, setState
 from clojure.lang.cons import Cons
 
 def mask(h, shift):
@@ -36,7 +41,7 @@ def createNode(*args):
 
     key1hash = hash(key1)
     if key1hash == key2hash:
-        return HashCollisionNode(None, key1hash, 2, [key1, val1, key2, val2])
+        return HashCollisionNode(edit, key1hash, 2, [key1, val1, key2, val2])
     nbox = Box(None)
     nd1 =  EMPTY_BITMAP_NODE \
             .assocEd(edit, shift, key1hash, key1, val1, nbox)
@@ -132,6 +137,9 @@ class PersistentHashMap(APersistentMap, IEditableCollection, IObj):
         else:
             return False
         
+    def asTransient(self):
+        return TransientHashMap(self)
+
     def __repr__(self):
         s = []
         for x in self:
@@ -140,13 +148,87 @@ class PersistentHashMap(APersistentMap, IEditableCollection, IObj):
         return "{" + " ".join(s) + "}"
 
 def fromDict(d):
-    m = EMPTY
+    m = EMPTY.asTransient()
     for v in d:
-        m = m.assoc(v, d[v])
-    return m
+        m.assoc(v, d[v])
+    return m.persistent()
+
+
+class TransientHashMap(ATransientMap):
+    """A map that assoc and without change in place, for building a
+    PersistentHashMap in bulk. See PersistentHashMap.asTransient().
+
+    The nodes it made carry its edit token and are changed in place (see
+    the assocEd and withoutEd paths of the nodes), the others are copied
+    first. persistent() clears the token."""
+    def __init__(self, m):
+        self.edit = AtomicReference(currentThread())
+        self.root = m.root
+        self._count = m.count
+        self.hasNull = m.hasNull
+        self.noneValue = m.noneValue
+        self.leafFlag = Box(None)
+
+    def ensureEditable(self):
+        owner = self.edit.get()
+        if owner is currentThread():
+            return
+        if owner is not None:
+            raise IllegalAccessError("Transient used by non-owner thread")
+        raise IllegalAccessError("Transient used after persistent! call")
+
+    def doAssoc(self, key, val):
+        if key is None:
+            self.noneValue = val
+            if not self.hasNull:
+                self._count += 1
+                self.hasNull = True
+            return self
+        self.leafFlag.val = None
+        root = EMPTY_BITMAP_NODE if self.root is None else self.root
+        self.root = root.assocEd(self.edit, 0, hash(key), key, val,
+                                 self.leafFlag)
+        if self.leafFlag.val is not None:
+            self._count += 1
+        return self
+
+    def doWithout(self, key):
+        if key is None:
+            if self.hasNull:
+                self.hasNull = False
+                self.noneValue = None
+                self._count -= 1
+            return self
+        if self.root is None:
+            return self
+        removedLeaf = Box(None)
+        self.root = self.root.withoutEd(self.edit, 0, hash(key), key,
+                                        removedLeaf)
+        if removedLeaf.val is not None:
+            self._count -= 1
+        return self
+
+    def doValAt(self, key, notFound = None):
+        if key is None:
+            return self.noneValue if self.hasNull else notFound
+        if self.root is None:
+            return notFound
+        return self.root.find(0, hash(key), key, notFound)
+
+    def doCount(self):
+        return self._count
+
+    def doPersistent(self):
+        self.edit.set(None)
+        return PersistentHashMap(self._count, self.root, self.hasNull,
+                                 self.noneValue)
 
 
 class INode(object):
+    __slots__ = ()
+    __getstate__ = getState
+    __setstate__ = setState
+
     def assoc(self, shift,  hsh, key, val, addedLeaf):
         raise AbstractMethodCall(self)
 
@@ -166,6 +248,8 @@ class INode(object):
         raise AbstractMethodCall(self)
 
 class ArrayNode(INode):
+    __slots__ = ("edit", "count", "array")
+
     def __init__(self, edit, count, array):
         self.edit = edit
         self.count = count
@@ -189,9 +273,9 @@ class ArrayNode(INode):
         if node is None:
             return self
         n = node.without(shift + 5, hsh, key)
-        if n is None:
+        if n is node:
             return self
-        if node is None:
+        if n is None:
             if self.count <= 8:
                 return self.pack(None, idx)
             return ArrayNode(None, self.count - 1, cloneAndSet(self.array, idx, n))
@@ -206,7 +290,7 @@ class ArrayNode(INode):
         return node.find(shift + 5, hsh, key, notFound)
 
     def ensureEditable(self, edit):
-        if self.edit == edit:
+        if self.edit is edit:
             return self
         return ArrayNode(edit, self.count, self.array[:])
 
@@ -220,14 +304,14 @@ class ArrayNode(INode):
         j = 1
         bitmap = 0
         for i in range(0, idx):
-            if self.array[i] is None:
+            if self.array[i] is not None:
                 newArray[j] = self.array[i]
                 bitmap |= 1 << i
                 j += 2
         for i in range(idx + 1, len(self.array)):
-            if self.array[i] is None:
+            if self.array[i] is not None:
                 newArray[j] = self.array[i]
-                bitmap != 1 << i
+                bitmap |= 1 << i
                 j += 2
         return BitmapIndexedNode(edit, bitmap, newArray)
 
@@ -239,7 +323,7 @@ class ArrayNode(INode):
             editable = self.editAndSet(edit, idx, nnode)
             editable.count += 1
             return editable
-        n = node.assoc(edit, shift + 5, hsh, key, val, addedLeaf)
+        n = node.assocEd(edit, shift + 5, hsh, key, val, addedLeaf)
         if n is node:
             return self
         return self.editAndSet(edit, idx, n)
@@ -249,7 +333,7 @@ class ArrayNode(INode):
         node = self.array[idx]
         if node is None:
             return self
-        n = node.without(edit, shift + 5, hsh, key, removedLeaf)
+        n = node.withoutEd(edit, shift + 5, hsh, key, removedLeaf)
         if n is node:
             return self
         if n is None:
@@ -264,6 +348,8 @@ class ArrayNode(INode):
         return createSeq(self.array)
 
 class Seq(ASeq):
+    __slots__ = ("_meta", "nodes", "i", "s")
+
     def __init__(self, meta, nodes, i, s):
         self._meta = meta
         self.nodes = nodes
@@ -295,6 +381,8 @@ def createSeq(*args):
     return None
 
 class BitmapIndexedNode(INode):
+    __slots__ = ("edit", "bitmap", "array")
+
     def __init__(self, edit, bitmap, array):
         self.edit = edit
         self.bitmap = bitmap
@@ -392,7 +480,7 @@ class BitmapIndexedNode(INode):
         n = bitCount(self.bitmap)
         newArray = [None] * (2*(n+1) if n >= 0 else 4) # make room for next assoc
         arrayCopy(self.array, 0, newArray, 0, 2*n)
-        return BitmapIndexedNode(self.edit, self.bitmap, newArray)
+        return BitmapIndexedNode(edit, self.bitmap, newArray)
 
     def editAndSet(self, edit, i, a, j = None, b = None):
         editable = self.ensureEditable(edit)
@@ -418,13 +506,14 @@ class BitmapIndexedNode(INode):
             keyOrNull = self.array[2*idx]
             valOrNode = self.array[2*idx+1]
             if keyOrNull is None:
-                n = valOrNode.assoc(edit, shift + 5, hsh, key, val, addedLeaf)
-                if n == valOrNode:
+                n = valOrNode.assocEd(edit, shift + 5, hsh, key, val,
+                                      addedLeaf)
+                if n is valOrNode:
                     return self
                 return self.editAndSet(edit, 2*idx+1, n)
 
             if key == keyOrNull:
-                if val == valOrNode:
+                if val is valOrNode:
                     return self
                 return self.editAndSet(edit, 2*idx+1, val)
             addedLeaf.val = addedLeaf
@@ -478,7 +567,7 @@ class BitmapIndexedNode(INode):
         keyOrNull = self.array[2*idx]
         valOrNode = self.array[2*idx+1]
         if keyOrNull is None:
-            n = valOrNode.without(edit, shift + 5, hsh, key, removedLeaf)
+            n = valOrNode.withoutEd(edit, shift + 5, hsh, key, removedLeaf)
             if n is valOrNode:
                 return self
             if n is not None:
@@ -489,10 +578,12 @@ class BitmapIndexedNode(INode):
 
         if key == keyOrNull:
             removedLeaf.val = removedLeaf
-            return self.editAndRemovePair(self.edit, bit, idx)
+            return self.editAndRemovePair(edit, bit, idx)
         return self
 
 class HashCollisionNode(INode):
+    __slots__ = ("edit", "hsh", "count", "array")
+
     def __init__(self, edit, hsh, count, array):
         self.edit = edit
         self.hsh = hsh
@@ -599,6 +690,8 @@ class HashCollisionNode(INode):
         return editable
 
 class NodeSeq(ASeq):
+    __slots__ = ("_meta", "array", "i", "s")
+
     def __init__(self, *args):
         if len(args) == 3:
             self.array, self.i, self.s = args
@@ -12,6 +12,8 @@ from clojure.lang.cljexceptions import ArityException, IllegalStateException
 
 
 class PersistentList(ASeq, IPersistentList, IReduce, Counted):
+    __slots__ = ("_meta", "_first", "_rest", "_count", "_hash")
+
     def __init__(self, *args):
         """Instantiate a PersistentList.
 
@@ -161,6 +163,8 @@ def creator(*args):
 
 class EmptyList(Obj, IPersistentList, ISeq, Counted, IPrintable):
     """A list of zero objects."""
+    __slots__ = ("_meta",)
+
     def __init__(self, meta=None):
         """This is a psuedo-singleton class, use persistentlist.EMPTY."""
         self._meta = meta
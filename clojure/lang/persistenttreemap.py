@@ -10,6 +10,7 @@ from clojure.lang.iobj import IObj
 from clojure.lang.ipersistentmap import IPersistentMap
 from clojure.lang.iseq import ISeq
 from clojure.lang.reversible import Reversible
+from clojure.lang.slots import getState, setState
 import clojure.lang.rt as RT
 
 
@@ -374,6 +375,10 @@ def black(key, val, left, right):
 
 
 class Node(object):
+    __slots__ = ("_key",)
+    __getstate__ = getState
+    __setstate__ = setState
+
     def __init__(self, key):
         self._key = key
 
@@ -420,6 +425,8 @@ class Node(object):
 
 
 class Black(Node):
+    __slots__ = ()
+
     def addLeft(self, ins):
         return ins.balanceLeft(self)
 
@@ -443,6 +450,8 @@ class Black(Node):
 
 
 class BlackVal(Black):
+    __slots__ = ("_val",)
+
     def __init__(self, key, val):
         super(BlackVal, self).__init__(key)
         self._val = val
@@ -455,6 +464,8 @@ class BlackVal(Black):
 
 
 class BlackBranch(Black):
+    __slots__ = ("_left", "_right")
+
     def __init__(self, key, left, right):
         super(BlackBranch, self).__init__(key)
         self._left = left
@@ -471,6 +482,8 @@ class BlackBranch(Black):
 
 
 class BlackBranchVal(BlackBranch):
+    __slots__ = ("_val",)
+
     def __init__(self, key, val, left, right):
         super(BlackBranchVal, self).__init__(key, left, right)
         self._val = val
@@ -483,6 +496,8 @@ class BlackBranchVal(BlackBranch):
 
 
 class Red(Node):
+    __slots__ = ()
+
     def addLeft(self, ins):
         return red(self._key, self.val(), ins, self.right())
 
@@ -506,6 +521,8 @@ class Red(Node):
 
 
 class RedVal(Red):
+    __slots__ = ("_val",)
+
     def __init__(self, key, val):
         super(RedVal, self).__init__(key)
         self._val = val
@@ -518,6 +535,8 @@ class RedVal(Red):
 
 
 class RedBranch(Red):
+    __slots__ = ("_left", "_right")
+
     def __init__(self, key, left, right):
         super(RedBranch, self).__init__(key)
         self._left = left
@@ -552,6 +571,8 @@ class RedBranch(Red):
 
 
 class RedBranchVal(RedBranch):
+    __slots__ = ("_val",)
+
     def __init__(self, key, val, left, right):
         super(RedBranchVal, self).__init__(key, left, right)
         self._val = val
@@ -1,9 +1,20 @@
+from threading import currentThread
+
 import clojure.lang.rt as RT
 from clojure.lang.atomicreference import AtomicReference
 from clojure.lang.apersistentvector import APersistentVector
+from clojure.lang.arraychunk import ArrayChunk
+from clojure.lang.aseq import ASeq
 from clojure.lang.cljexceptions import (ArityException,
+                                        IllegalAccessError,
                                         IllegalStateException,
-                                        IndexOutOfBoundsException)
+                                        IndexOutOfBoundsException,
+                                        InvalidArgumentException)
+from clojure.lang.counted import Counted
+from clojure.lang.ichunkedseq import IChunkedSeq
+from clojure.lang.ieditablecollection import IEditableCollection
+from clojure.lang.itransientvector import ITransientVector
+from clojure.lang.slots import getState, setState
 
 
 # Acts sort-of-like supplied-p in Common Lisp.
@@ -12,7 +23,7 @@ from clojure.lang.cljexceptions import (ArityException,
 _notSupplied = object()
 
 
-class PersistentVector(APersistentVector):
+class PersistentVector(APersistentVector, IEditableCollection):
     """An indexable array where each operation such as cons and assocN return
     a *new* PersistentVector. The two vectors share old state, but the new
     state is only present in the newly returned vector. This preserves the
@@ -229,6 +240,34 @@ class PersistentVector(APersistentVector):
         return PersistentVector(self.meta(), self._cnt - 1, newshift, newroot,
                                 newtail)
 
+    def __iter__(self):
+        """Return an iterator on this vector, which walks the leaf Nodes in
+        order rather than looking up each index."""
+        for i in xrange(0, self._tailoff(), 32):
+            for x in self._arrayFor(i):
+                yield x
+        for x in self._tail:
+            yield x
+
+    def headTuple(self, n):
+        """Return the first n items of this vector (all of them if it has
+        fewer) as a tuple, copied a leaf Node at a time."""
+        n = min(n, self._cnt)
+        items = []
+        for i in xrange(0, n, 32):
+            items.extend(self._arrayFor(i)[:n - i])
+        return tuple(items)
+
+    def seq(self):
+        """Return a ChunkedSeq on this vector or None if empty."""
+        if not self._cnt:
+            return None
+        return ChunkedSeq(self, self._arrayFor(0), 0, 0)
+
+    def asTransient(self):
+        """Return a TransientVector with the contents of this vector."""
+        return TransientVector(self)
+
     def _popTail(self, level, node):
         """Return a new root Node or None if the last value was popped.
 
@@ -253,6 +292,324 @@ class PersistentVector(APersistentVector):
             ret._array[subidx] = None
             return ret
 
+# ======================================================================
+# ChunkedSeq
+# ======================================================================
+
+class ChunkedSeq(ASeq, IChunkedSeq, Counted):
+    """A seq on a PersistentVector whose chunks are its leaf lists.
+
+    Each step of first and next stays within the current leaf, which is only
+    looked up (see PersistentVector._arrayFor) once per 32 items. The leaves
+    are full and the _tail holds exactly the items after them, so a chunk
+    always ends with its list.
+
+    _vec -- PersistentVector, the vector being walked
+    _node -- list, the leaf (or _tail) holding the current item
+    _i -- integer, the index in _vec of the first item of _node
+    _offset -- integer, the index in _node of the current item
+    _meta -- IPersistentHashMap, meta data attached to the seq"""
+    __slots__ = ("_meta", "_vec", "_node", "_i", "_offset")
+
+    def __init__(self, vec, node, i, offset, meta=None):
+        """Instantiate a ChunkedSeq.
+
+        vec -- PersistentVector
+        node -- list, the leaf of vec holding the item at index i
+        i -- integer, a multiple of 32
+        offset -- integer, the index in node of the first item of the seq
+        meta -- IPersistentHashMap, optional meta data"""
+        self._meta = meta
+        self._vec = vec
+        self._node = node
+        self._i = i
+        self._offset = offset
+
+    def first(self):
+        """Return the current item."""
+        return self._node[self._offset]
+
+    def next(self):
+        """Return a ChunkedSeq on the items after the current one, or None if
+        it is the last one."""
+        if self._offset + 1 < len(self._node):
+            return ChunkedSeq(self._vec, self._node, self._i,
+                              self._offset + 1)
+        return self.chunkedNext()
+
+    def chunkedFirst(self):
+        """Return an ArrayChunk on the rest of the current leaf."""
+        return ArrayChunk(self._node, self._offset, len(self._node))
+
+    def chunkedNext(self):
+        """Return a ChunkedSeq on the next leaf, or None if this is the
+        last one."""
+        i = self._i + len(self._node)
+        if i < self._vec._cnt:
+            return ChunkedSeq(self._vec, self._vec._arrayFor(i), i, 0)
+        return None
+
+    def chunkedMore(self):
+        """Return a ChunkedSeq on the next leaf, or () if this is the last
+        one."""
+        s = self.chunkedNext()
+        if s is None:
+            from clojure.lang.persistentlist import EMPTY as EMPTY_LIST
+            return EMPTY_LIST
+        return s
+
+    def __len__(self):
+        """Return the number of items in this seq."""
+        return self._vec._cnt - self._i - self._offset
+
+    def __iter__(self):
+        """Return an iterator on this seq, which walks the leaves in turn."""
+        vec = self._vec
+        node = self._node
+        i = self._i
+        offset = self._offset
+        while True:
+            for x in xrange(offset, len(node)):
+                yield node[x]
+            i += len(node)
+            if i >= vec._cnt:
+                return
+            node = vec._arrayFor(i)
+            offset = 0
+
+    def meta(self):
+        """Return this seq's meta data, which may be None."""
+        return self._meta
+
+    def withMeta(self, meta):
+        """Return a ChunkedSeq on the same items with meta attached."""
+        if meta is self._meta:
+            return self
+        return ChunkedSeq(self._vec, self._node, self._i, self._offset, meta)
+
+# ======================================================================
+# TransientVector
+# ======================================================================
+
+class TransientVector(ITransientVector):
+    """A vector that conj, assocN and pop change in place, for building a
+    PersistentVector in bulk. See PersistentVector.asTransient().
+
+    It shares the Nodes of the vector it was made from, and copies each one
+    the first time it changes it. The Nodes it made itself carry its edit
+    token, and are changed in place. persistent() clears the token, after
+    which the transient may no longer be used.
+
+    _cnt -- integer, the total number of items in the vector
+    _shift -- integer, the depth of the tree, a multiple of 5, >=0
+    _root -- Node, the root tree node, always editable
+    _tail -- list of size 0 to 32, never shared"""
+    def __init__(self, v):
+        """Instantiate a TransientVector.
+
+        v -- PersistentVector, the initial contents"""
+        self._cnt = v._cnt
+        self._shift = v._shift
+        self._root = Node(AtomicReference(currentThread()), v._root._array[:])
+        self._tail = v._tail[:]
+
+    def _ensureEditable(self):
+        """Raise IllegalAccessError if this vector may not be changed (or
+        read) anymore by the current thread."""
+        owner = self._root._edit.get()
+        if owner is currentThread():
+            return
+        if owner is None:
+            raise IllegalAccessError("Transient used after persistent! call")
+        raise IllegalAccessError("Transient used by non-owner thread")
+
+    def _ensureEditableNode(self, node):
+        """Return node, or a copy of it that may be changed in place if it
+        was not made by this vector."""
+        if node._edit is self._root._edit:
+            return node
+        return Node(self._root._edit, node._array[:])
+
+    def __len__(self):
+        """Return the number of items in this vector."""
+        self._ensureEditable()
+        return self._cnt
+
+    def __call__(self, i):
+        """Return the item at i.
+
+        i -- integer >= 0
+
+        May raise IndexOutOfBoundsException."""
+        return self.nth(i)
+
+    def _tailoff(self):
+        """Return the beginning index of the tail.
+
+        This will be a multiple of 32, >= 0."""
+        if self._cnt < 32:
+            return 0
+        return ((self._cnt - 1) >> 5) << 5
+
+    def _arrayFor(self, i):
+        """Return the _tail list or a Node._array list holding index i.
+
+        May raise IndexOutOfBoundsException."""
+        if 0 <= i < self._cnt:
+            if i >= self._tailoff():
+                return self._tail
+            node = self._root
+            for level in range(self._shift, 0, -5):
+                node = node._array[(i >> level) & 0x01f]
+            return node._array
+        raise IndexOutOfBoundsException()
+
+    def nth(self, i, notFound=_notSupplied):
+        """Return the item at index i.
+
+        If i is out of bounds and notFound is supplied, return notFound, else
+        raise IndexOutOfBoundsException."""
+        self._ensureEditable()
+        if 0 <= i < self._cnt:
+            return self._arrayFor(i)[i & 0x01f]
+        elif notFound is _notSupplied:
+            raise IndexOutOfBoundsException()
+        else:
+            return notFound
+
+    def valAt(self, key, notFound=None):
+        """Return the item at index key, or notFound if key is not an index
+        of this vector."""
+        self._ensureEditable()
+        if (isinstance(key, (int, long)) and not isinstance(key, bool)
+            and 0 <= key < self._cnt):
+            return self._arrayFor(key)[key & 0x01f]
+        return notFound
+
+    def conj(self, val):
+        """Append val to this vector and return it."""
+        self._ensureEditable()
+        # there's room in the _tail for val
+        if self._cnt - self._tailoff() < 32:
+            self._tail.append(val)
+            self._cnt += 1
+            return self
+        # _tail is full, push it into the tree
+        tailnode = Node(self._root._edit, self._tail)
+        self._tail = [val]
+        # no room at this level for the Node, add a new level
+        if (self._cnt >> 5) > (1 << self._shift):
+            newroot = Node(self._root._edit)
+            newroot._array[0] = self._root
+            newroot._array[1] = _newPath(self._root._edit, self._shift,
+                                         tailnode)
+            self._shift += 5
+        # room at this level for the new Node
+        else:
+            newroot = self._pushTail(self._shift, self._root, tailnode)
+        self._root = newroot
+        self._cnt += 1
+        return self
+
+    def _pushTail(self, level, parent, tailnode):
+        """Add tailnode to the tree at the given level and return the
+        (editable) parent."""
+        parent = self._ensureEditableNode(parent)
+        subidx = ((self._cnt - 1) >> level) & 0x01f
+        if level == 5:
+            nodeToInsert = tailnode
+        else:
+            child = parent._array[subidx]
+            nodeToInsert = (self._pushTail(level - 5, child, tailnode)
+                            if child is not None
+                            else _newPath(self._root._edit, level - 5,
+                                          tailnode))
+        parent._array[subidx] = nodeToInsert
+        return parent
+
+    def assocN(self, i, val):
+        """Set the item at index i to val and return this vector.
+
+        Appends val if i is the length of this vector. If i is > the length,
+        raise IndexOutOfBoundsException."""
+        self._ensureEditable()
+        if 0 <= i < self._cnt:
+            if i >= self._tailoff():
+                self._tail[i & 0x01f] = val
+            else:
+                self._root = self._doAssoc(self._shift, self._root, i, val)
+            return self
+        if i == self._cnt:
+            return self.conj(val)
+        raise IndexOutOfBoundsException()
+
+    def _doAssoc(self, level, node, i, val):
+        """Set the item at index i to val below node, return the (editable)
+        node."""
+        ret = self._ensureEditableNode(node)
+        if not level:
+            ret._array[i & 0x01f] = val
+        else:
+            subidx = (i >> level) & 0x01f
+            ret._array[subidx] = self._doAssoc(level - 5, node._array[subidx],
+                                               i, val)
+        return ret
+
+    def assoc(self, key, val):
+        """Same as assocN, key must be an integer."""
+        if not isinstance(key, (int, long)) or isinstance(key, bool):
+            raise InvalidArgumentException("Key must be integer")
+        return self.assocN(key, val)
+
+    def pop(self):
+        """Remove the last item of this vector and return it.
+
+        Will raise IllegalStateException if this vector is empty."""
+        self._ensureEditable()
+        if not self._cnt:
+            raise IllegalStateException("Can't pop empty vector")
+        # pop from the _tail, done
+        if self._cnt == 1 or self._cnt - self._tailoff() > 1:
+            self._tail.pop()
+            self._cnt -= 1
+            return self
+        # the last Node becomes the _tail
+        newtail = self._arrayFor(self._cnt - 2)[:]
+        newroot = self._popTail(self._shift, self._root)
+        if newroot is None:
+            newroot = Node(self._root._edit)
+        if self._shift > 5 and newroot._array[1] is None:
+            newroot = self._ensureEditableNode(newroot._array[0])
+            self._shift -= 5
+        self._root = newroot
+        self._cnt -= 1
+        self._tail = newtail
+        return self
+
+    def _popTail(self, level, node):
+        """Remove the Node holding index _cnt - 2 from the tree below node.
+        Return the (editable) node, or None if it is left empty."""
+        node = self._ensureEditableNode(node)
+        subidx = ((self._cnt - 2) >> level) & 0x01f
+        if level > 5:
+            newchild = self._popTail(level - 5, node._array[subidx])
+            if newchild is None and not subidx:
+                return None
+            node._array[subidx] = newchild
+            return node
+        elif not subidx:
+            return None
+        node._array[subidx] = None
+        return node
+
+    def persistent(self):
+        """Return a PersistentVector with the contents of this vector, which
+        may not be used anymore."""
+        self._ensureEditable()
+        self._root._edit.set(None)
+        return PersistentVector(self._cnt, self._shift, self._root,
+                                self._tail)
+
 # ======================================================================
 # PersistentVector Helpers
 # ======================================================================
@@ -260,7 +617,7 @@ class PersistentVector(APersistentVector):
 def _newPath(edit, level, node):
     """Return a Node.
 
-    edit -- currently unused (for Clojure's transient data structures)
+    edit -- AtomicReference, the edit token of the new Nodes
     level -- integer, multiple of 5, >= 5, stop recurring when 0
     node -- Node, the new path will lead *to* this node
 
@@ -295,10 +652,15 @@ def _doAssoc(level, node, i, val):
 
 class Node(object):
     """A tree node in a PersistentVector."""
+    __slots__ = ("_edit", "_array")
+    __getstate__ = getState
+    __setstate__ = setState
+
     def __init__(self, edit, array=None):
         """Instantiate a Node.
 
-        edit -- currently unused (for Clojure's transient data structures)
+        edit -- AtomicReference, the token of the TransientVector that may
+                change this node in place, see TransientVector
         array -- An optional list of size 32. It will be initialized to [None]
                  * 32 if not supplied."""
         self._edit = edit
@@ -317,12 +679,14 @@ def vec(seq):
     contain the items in seq."""
     if isinstance(seq, APersistentVector):
         return seq
+    if isinstance(seq, (list, tuple)):
+        return fromSequence(seq)
     s = RT.seq(seq)
-    v = EMPTY
+    v = EMPTY.asTransient()
     while s is not None:
-        v = v.cons(RT.first(s))
+        v.conj(RT.first(s))
         s = RT.next(s)
-    return v
+    return v.persistent()
 
 
 def create(*args):
@@ -331,16 +695,44 @@ def create(*args):
     args -- zero or more objects
 
     The returned vector will contain all objects found in args."""
-    x = EMPTY
-    for z in args:
-        x = x.cons(z)
-    return x
+    return fromSequence(args)
+
+
+def fromSequence(items):
+    """Return a PersistentVector.
+
+    items -- a Python list or tuple, or any iterable
+
+    The returned vector will contain the items in items. Its tree is laid out
+    directly: the leaf Nodes are slices of items, and each level above is
+    built from the one below."""
+    if not isinstance(items, (list, tuple)):
+        items = list(items)
+    cnt = len(items)
+    if not cnt:
+        return EMPTY
+    tailoff = ((cnt - 1) >> 5) << 5 if cnt > 32 else 0
+    nodes = [Node(NOEDIT, list(items[i:i + 32]))
+             for i in xrange(0, tailoff, 32)]
+    shift = 5
+    while len(nodes) > 32:
+        nodes = [Node(NOEDIT, _padded(nodes[i:i + 32]))
+                 for i in xrange(0, len(nodes), 32)]
+        shift += 5
+    return PersistentVector(cnt, shift, Node(NOEDIT, _padded(nodes)),
+                            list(items[tailoff:]))
+
+
+def _padded(nodes):
+    """Return nodes, a list of at most 32 Nodes, padded with None to the
+    size of a Node._array."""
+    return nodes + [None] * (32 - len(nodes))
 
 # ======================================================================
 # Pseudo-Singletons
 # ======================================================================
 
-# currently unused (for Clojure's transient data structures)
+# The edit token of the persistent Nodes, never set to a thread
 NOEDIT = AtomicReference()
 # A Node holding no children or vector values
 EMPTY_NODE = Node(NOEDIT)
@@ -2,5 +2,7 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 
 
 class Reversible(object):
+    __slots__ = ()
+
     def rseq(self):
         raise AbstractMethodCall(self)
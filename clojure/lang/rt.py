@@ -121,11 +121,14 @@ def list(*args):
 
 
 def vector(*args):
-    from clojure.lang.persistentvector import EMPTY
-    c = EMPTY
-    for x in args:
-        c = c.cons(x)
-    return c
+    from clojure.lang.persistentvector import EMPTY, EMPTY_NODE
+    from clojure.lang.persistentvector import PersistentVector, fromSequence
+    if not args:
+        return EMPTY
+    if len(args) <= 32:
+        # the items all fit in the tail
+        return PersistentVector(len(args), 5, EMPTY_NODE, _list(args))
+    return fromSequence(args)
 
 
 def map(*args):
@@ -134,20 +137,20 @@ def map(*args):
         return EMPTY
     if len(args) == 1:
         if isinstance(args[0], dict):
-            m = EMPTY
+            m = EMPTY.asTransient()
             for x in args[0]:
-                if x in m:
-                    raise InvalidArgumentException("Duplicate key")
-                m = m.assoc(x, args[0][x])
-            return m
+                m.assoc(x, args[0][x])
+            if len(m) != len(args[0]):
+                raise InvalidArgumentException("Duplicate key")
+            return m.persistent()
         if fulfillsIndexable(args[0]):
             args = args[0]
-    m = EMPTY
+    m = EMPTY.asTransient()
     for x in range(0, len(args), 2):
         key = args[x]
         value = args[x + 1]
-        m = m.assoc(key, value)
-    return m
+        m.assoc(key, value)
+    return m.persistent()
 
 def set(*args):
     from clojure.lang.persistenthashset import EMPTY
@@ -189,6 +192,27 @@ def subvec(v, start, end):
     return SubVec(None, v, start, end)
 
 
+def indexedTuple(coll, n):
+    """Returns the first n items of coll as a tuple, padded with None: what
+    (nth coll i nil) returns for i below n. Only does so for nil, vectors,
+    Python tuples, lists and strs, and returns None for anything else (see
+    destructure in clojure.core)."""
+    from clojure.lang.persistentvector import PersistentVector
+    if coll is None:
+        return (None,) * n
+    if isinstance(coll, (pyTupleType, pyListType, pyStrType)):
+        items = tuple(coll[:n])
+    elif isinstance(coll, PersistentVector):
+        items = coll.headTuple(n)
+    elif isinstance(coll, IPersistentVector):
+        items = tuple([coll[i] for i in xrange(min(n, len(coll)))])
+    else:
+        return None
+    if len(items) < n:
+        items += (None,) * (n - len(items))
+    return items
+
+
 stringEscapeMap = {
     "\a" : "<???>",                  # XXX
     "\b" : "\\b",
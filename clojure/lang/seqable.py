@@ -2,5 +2,7 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 
 
 class Seqable(object):
+    __slots__ = ()
+
     def seq(self):
         raise AbstractMethodCall(self)
@@ -1,2 +1,2 @@
 class Sequential(object):
-    pass
+    __slots__ = ()
@@ -0,0 +1,24 @@
+"""Pickling support for the classes laid out with __slots__.
+
+The nodes and seqs of the persistent collections have no __dict__, which
+pickle protocols 0 and 1 need unless the class defines __getstate__. The
+classes at the root of those hierarchies use these as their __getstate__
+and __setstate__.
+"""
+
+
+def getState(self):
+    """Returns the slot values (and the __dict__ items of subclasses that
+    have one) of self as a dict."""
+    state = dict(getattr(self, "__dict__", ()))
+    for cls in type(self).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+    return state
+
+
+def setState(self, state):
+    """Restores the attributes returned by getState."""
+    for name, value in state.iteritems():
+        setattr(self, name, value)
@@ -3,19 +3,20 @@
 define main().
 """
 
-import cPickle
-import imp
 from optparse import OptionParser
 import os.path
 import sys
 import traceback
 
+from clojure.lang.bytecodecache import (CacheWriter, ModuleWriter, readCache,
+                                        isModuleFresh, stampDependencies)
 from clojure.lang.cljexceptions import NoNamespaceException
-from clojure.lang.compiler import Compiler
+from clojure.lang.compiler import Compiler, COMPILER_VERSION
+from clojure.lang.constpool import resolve
 from clojure.lang.fileseq import StringReader
 from clojure.lang.globals import currentCompiler
 from clojure.lang.lispreader import read
-from clojure.lang.namespace import Namespace, findItem
+from clojure.lang.namespace import Namespace, findItem, findNS
 import clojure.lang.rt as RT
 from clojure.lang.symbol import Symbol
 from clojure.lang.var import threadBindings
@@ -31,18 +32,15 @@ class MetaImporter(object):
 
     def find_module(self, fullname, path=None):
         """Finds a clj file if there is no package with the same name.
+
+        A clj file with an up-to-date compiled module (see compileNamespace)
+        is left to the standard import machinery.
         """
-        lastname = fullname.rsplit(".", 1)[-1]
-        for d in path or sys.path:
-            clj = os.path.join(d, lastname + ".clj")
-            pkg = os.path.join(d, lastname, "__init__.py")
-            pkgc = getattr(imp, "cache_from_source",
-                           lambda path: path + "c")(pkg)
-            if (os.path.exists(clj) and
-                not (os.path.exists(pkg) or os.path.exists(pkgc))):
-                self.path = clj
-                return self
-        return None
+        clj = findClj(fullname, path)
+        if clj is None or isModuleFresh(clj):
+            return None
+        self.path = clj
+        return self
 
     def load_module(self, name):
         """Loads a clj file, returns the corresponding namespace if it exists.
@@ -67,6 +65,53 @@ class MetaImporter(object):
     def is_package(self, name):
         return False
 
+    def invalidate_caches(self):
+        """Forgets the cached directory listings (see listDirectory).
+        """
+        _listings.clear()
+
+
+def findClj(fullname, path=None):
+    """Returns the path of the clj file of a module, or None if there is no
+    such file or if it is shadowed by a package.
+    """
+    lastname = fullname.rsplit(".", 1)[-1]
+    clj = lastname + ".clj"
+    for d in path or sys.path:
+        if clj in listDirectory(d):
+            pkg = listDirectory(os.path.join(d, lastname))
+            if not ("__init__.py" in pkg or "__init__.pyc" in pkg):
+                return os.path.join(d, clj)
+    return None
+
+
+# Maps absolute directory paths to (mtime, names of entries) pairs.
+_listings = {}
+
+
+def listDirectory(d):
+    """Returns the names of the entries of a directory, as a frozenset, or an
+    empty frozenset if it is not a readable directory.
+
+    Listings are cached until the mtime of the directory changes. Checking
+    that mtime still costs a stat per directory and per lookup, as many as
+    the os.path.exists calls on missing files it replaces.
+    """
+    d = os.path.abspath(d)
+    try:
+        mtime = os.stat(d).st_mtime
+    except OSError:
+        return frozenset()
+    cached = _listings.get(d)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        names = frozenset(os.listdir(d))
+    except OSError:
+        names = frozenset()
+    _listings[d] = mtime, names
+    return names
+
 
 sys.meta_path.append(MetaImporter())
 # "" is the directory where the script is run, not the one where it is
@@ -79,32 +124,136 @@ def requireClj(filename, stopafter=None):
     
     If `stopafter` is given, then stop execution as soon as the `stopafter`
     name is defined in the current namespace of the compiler.
+
+    The compiled code is cached next to the clj file (see
+    clojure.lang.bytecodecache) and reused as long as neither the file nor
+    the clj files it was compiled against change, skipping both the reader
+    and the compiler.
+    """
+    RT.init()
+    comp = Compiler()
+    comp.setFile(filename)
+
+    for dependencies in _compiling:
+        dependencies.add(filename)
+    with threadBindings({currentCompiler: comp}):
+        cached = readCache(filename)
+        if cached is not None:
+            for dependencies in _compiling:
+                dependencies.update(cached[0])
+            runCompiled(comp, cached[1], stopafter)
+        else:
+            writer = CacheWriter(filename)
+            _compiling.append(writer.dependencies)
+            try:
+                compileClj(comp, filename, writer, stopafter)
+            finally:
+                _compiling.pop()
+
+
+# The dependencies (see CacheWriter) of the clj files being compiled by
+# requireClj, innermost last.
+_compiling = []
+
+
+def compileClj(comp, filename, writer, stopafter=None):
+    """Compiles and executes the top-level forms of a clj file one at a time,
+    handing their code objects to `writer` (see
+    clojure.lang.bytecodecache.CacheWriter), which is committed once the
+    whole file has been compiled. Returns what the commit returns, or False
+    if the file was not compiled to the end.
     """
     with open(filename) as fl:
         r = StringReader(fl.read())
+    if writer.valid:
+        comp.setRelocatable()
+    try:
+        while True:
+            EOF = object()
+            s = read(r, False, EOF, True)
+            if s is EOF:
+                break
+            try:
+                res = comp.assemble(comp.compile(s))
+                refs = comp.popConstRefs()
+                if res is not None:
+                    writer.add(res, refs)
+                    comp.executeCodeObject(res)
+                if stopafter is not None and hasattr(comp.getNS(), stopafter):
+                    return False
+            except Exception as exp:
+                print s, filename
+                raise
+    except IOError as e:
+        return False
+    return writer.commit()
+
+
+def runCompiled(comp, codes, stopafter=None):
+    """Executes the relocated code objects of the top-level forms of a clj
+    file, as stored by compileClj.
+    """
+    for code in codes:
+        comp.executeCodeObject(resolve(code, comp))
+        if stopafter is not None and hasattr(comp.getNS(), stopafter):
+            break
+
+
+def compileNamespace(name):
+    """Compiles a namespace ahead of time, into an importable Python module
+    written next to its clj file. Returns the path of the module.
+
+    The module runs the compiled top-level forms of the namespace in order,
+    without the reader or the compiler.
+    """
+    parent = name.rpartition(".")[0]
+    path = None
+    if parent:
+        __import__(parent)
+        path = getattr(sys.modules[parent], "__path__", None)
+    filename = findClj(name, path)
+    if filename is None:
+        raise ImportError("No clj file found for namespace {0}".format(name))
 
     RT.init()
     comp = Compiler()
     comp.setFile(filename)
+    writer = ModuleWriter(filename)
+    _compiling.append(writer.dependencies)
+    try:
+        with threadBindings({currentCompiler: comp}):
+            path = compileClj(comp, filename, writer)
+    finally:
+        _compiling.pop()
+    if not path:
+        raise IOError("Could not compile {0}".format(filename))
+    if findNS(name) is None:
+        raise NoNamespaceException(filename, name)
+    return path
+
 
-    with threadBindings({currentCompiler: comp}): #, open(filename + ".cljc", "w") as o:
-        try:
-            while True:
-                EOF = object()
-                s = read(r, False, EOF, True)
-                if s is EOF:
-                    break
-                #cPickle.dump(s, o)
-                try:
-                    res = comp.compile(s)
-                    comp.executeCode(res)
-                    if stopafter is not None and hasattr(comp.getNS(), stopafter):
-                        break
-                except Exception as exp:
-                    print s, filename
-                    raise
-        except IOError as e:
-            pass
+def loadCompiledModule(name, stamp, codes):
+    """Runs the code objects of a module written by compileNamespace. This
+    is what the code of the module itself calls, with the header of its clj
+    file (see clojure.lang.bytecodecache.sourceStamp).
+
+    The plain module object created by the import machinery is replaced by
+    the namespace the code creates.
+    """
+    if stamp[1] != COMPILER_VERSION:
+        raise ImportError(
+            "{0} was compiled by another version of clojure-py".format(name))
+    module = sys.modules.pop(name)
+    for dependencies in _compiling:
+        dependencies.add(os.path.splitext(module.__file__)[0] + ".clj")
+        dependencies.update(stampDependencies(stamp))
+    RT.init()
+    comp = Compiler()
+    comp.setFile(module.__file__)
+    with threadBindings({currentCompiler: comp}):
+        runCompiled(comp, codes)
+    if findNS(name) is None:
+        raise NoNamespaceException(module.__file__, name)
 
 
 def main():
@@ -118,7 +267,8 @@ def main():
         del parser.rargs[:]
 
     parser = OptionParser(
-        usage="%prog [options] ... [-c cmd | file | -] [arg] ...",
+        usage="%prog [options] ... [-c cmd | file | -] [arg] ...\n"
+              "       %prog --compile namespace ...",
         version=VERSION_MSG)
     parser.add_option("-c",
         action="callback", dest="cmd", default="", callback=gobble,
@@ -127,6 +277,9 @@ def main():
         help="inspect interactively after running script")
     parser.add_option("-q", action="store_true", dest="quiet",
         help="don't print version message on interactive startup")
+    parser.add_option("--compile", action="store_true", dest="compile",
+        help="compile the given namespaces to importable .pyc modules, "
+             "written next to their clj files")
     # fooling OptionParser
     parser.add_option("--\b\bfile", action="store_true",
         help="    program read from script file")
@@ -145,6 +298,11 @@ def main():
     command_line_args.extend(dash_and_post)
     opts.command_line_args = command_line_args
 
+    if opts.compile:
+        for name in ([source] if source else []) + command_line_args:
+            print "Compiling {0} to {1}".format(name, compileNamespace(name))
+        return
+
     RT.init()
     comp = Compiler()
 
@@ -0,0 +1,91 @@
+"""aot_tests.py
+
+Tests for ahead-of-time compiled namespaces.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import clojure.lang.bytecodecache as bcc
+from clojure.lang.bytecodecache import isModuleFresh, modulePath
+from clojure.main import MetaImporter, compileNamespace
+
+
+class TestAOT(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.clj = os.path.join(self.dir, "aotscratch.clj")
+        with open(self.clj, "w") as fl:
+            fl.write("(ns aotscratch)\n"
+                     "(defn twice [x] (* 2 x))\n"
+                     "(def answer (twice 21))\n")
+        sys.path.insert(0, self.dir)
+
+    def tearDown(self):
+        sys.path.remove(self.dir)
+        sys.modules.pop("aotscratch", None)
+        shutil.rmtree(self.dir)
+
+    def testCompile_PASS(self):
+        path = compileNamespace("aotscratch")
+        self.assertEqual(path, modulePath(self.clj))
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(isModuleFresh(self.clj))
+
+    def testImportCompiled_PASS(self):
+        compileNamespace("aotscratch")
+        sys.modules.pop("aotscratch")
+        self.assertEqual(MetaImporter().find_module("aotscratch"), None)
+        os.remove(self.clj)
+        import aotscratch
+        self.assertEqual(aotscratch.answer.deref(), 42)
+        self.assertEqual(aotscratch.twice(4), 8)
+
+    def testStaleModule_PASS(self):
+        compileNamespace("aotscratch")
+        st = os.stat(self.clj)
+        os.utime(self.clj, (st.st_atime, st.st_mtime + 10))
+        self.assertFalse(isModuleFresh(self.clj))
+        self.assertNotEqual(MetaImporter().find_module("aotscratch"), None)
+
+    def testStaleCompiler_PASS(self):
+        compileNamespace("aotscratch")
+        version = bcc.COMPILER_VERSION
+        bcc.COMPILER_VERSION = -1
+        try:
+            self.assertFalse(isModuleFresh(self.clj))
+            self.assertNotEqual(MetaImporter().find_module("aotscratch"),
+                                None)
+        finally:
+            bcc.COMPILER_VERSION = version
+
+    def testStaleDependency_PASS(self):
+        dep = os.path.join(self.dir, "aotscratchdep.clj")
+        with open(dep, "w") as fl:
+            fl.write("(ns aotscratchdep)\n(defmacro m [] 1)\n")
+        with open(self.clj, "w") as fl:
+            fl.write("(ns aotscratch (:require aotscratchdep))\n"
+                     "(def answer (aotscratchdep/m))\n")
+        try:
+            compileNamespace("aotscratch")
+            self.assertTrue(isModuleFresh(self.clj))
+            with open(dep, "w") as fl:
+                fl.write("(ns aotscratchdep)\n(defmacro m [] 10)\n")
+            self.assertFalse(isModuleFresh(self.clj))
+        finally:
+            sys.modules.pop("aotscratchdep", None)
+
+    def testFailedWrite_FAIL(self):
+        # the module cannot be renamed over a directory
+        os.mkdir(modulePath(self.clj))
+        self.assertRaises(OSError, compileNamespace, "aotscratch")
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["aotscratch.clj",
+                          os.path.basename(modulePath(self.clj))])
+        self.assertFalse(isModuleFresh(self.clj))
+
+    def testMissingNamespace_FAIL(self):
+        self.assertRaises(ImportError, compileNamespace, "aotscratch-none")
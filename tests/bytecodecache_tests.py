@@ -0,0 +1,94 @@
+"""bytecodecache_tests.py
+
+Tests for the on-disk cache of compiled clj files.
+"""
+
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import clojure.lang.bytecodecache as bcc
+from clojure.util.byteplay import Code, LOAD_CONST, RETURN_VALUE
+
+
+class TestBytecodeCache(unittest.TestCase):
+    def setUp(self):
+        self.dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+        self.dir = tempfile.mkdtemp()
+        self.clj = os.path.join(self.dir, "foo.clj")
+        with open(self.clj, "w") as fl:
+            fl.write("(+ 1 2)\n")
+        self.codes = [compile("1 + 2", "foo.clj", "eval"),
+                      compile("3 * 4", "foo.clj", "eval")]
+
+    def tearDown(self):
+        sys.dont_write_bytecode = self.dont_write_bytecode
+        shutil.rmtree(self.dir)
+
+    def write(self, codes, dependencies=()):
+        writer = bcc.CacheWriter(self.clj)
+        writer.dependencies.update(dependencies)
+        for code in codes:
+            writer.add(code)
+        return writer.commit()
+
+    def testCachePath_PASS(self):
+        self.assertEqual(bcc.cachePath(self.clj),
+                         os.path.join(self.dir, "foo.cljc"))
+
+    def testRoundTrip_PASS(self):
+        self.assertTrue(self.write(self.codes))
+        dependencies, cached = bcc.readCache(self.clj)
+        self.assertEqual(dependencies, (bcc.CORE_FILE,))
+        self.assertEqual([eval(c) for c in cached], [3, 12])
+
+    def testNoCache_PASS(self):
+        self.assertEqual(bcc.readCache(self.clj), None)
+
+    def testStaleSource_PASS(self):
+        self.write(self.codes)
+        with open(self.clj, "a") as fl:
+            fl.write("(+ 3 4)\n")
+        self.assertEqual(bcc.readCache(self.clj), None)
+
+    def testStaleDependency_PASS(self):
+        bar = os.path.join(self.dir, "bar.clj")
+        with open(bar, "w") as fl:
+            fl.write("(defmacro m [] 1)\n")
+        self.write(self.codes, [bar])
+        self.assertEqual(bcc.readCache(self.clj)[0],
+                         tuple(sorted([bcc.CORE_FILE, bar])))
+        with open(bar, "w") as fl:
+            fl.write("(defmacro m [] 10)\n")
+        self.assertEqual(bcc.readCache(self.clj), None)
+        self.write(self.codes, [bar])
+        os.remove(bar)
+        self.assertEqual(bcc.readCache(self.clj), None)
+
+    def testStaleCompiler_PASS(self):
+        self.write(self.codes)
+        stamp = list(bcc.sourceStamp(self.clj))
+        stamp[1] = -1
+        with open(bcc.cachePath(self.clj), "wb") as fl:
+            marshal.dump(tuple(stamp), fl)
+            marshal.dump(tuple(self.codes), fl)
+        self.assertEqual(bcc.readCache(self.clj), None)
+
+    def testCorruptCache_PASS(self):
+        with open(bcc.cachePath(self.clj), "wb") as fl:
+            fl.write("garbage")
+        self.assertEqual(bcc.readCache(self.clj), None)
+
+    def testUnmarshallable_PASS(self):
+        code = Code([(LOAD_CONST, object()), (RETURN_VALUE, None)],
+                    [], [], False, False, False, "foo", "foo.clj", 0, None)
+        self.assertFalse(self.write([self.codes[0], code.to_code()]))
+        self.assertFalse(os.path.exists(bcc.cachePath(self.clj)))
+
+    def testDontWriteBytecode_PASS(self):
+        sys.dont_write_bytecode = True
+        self.assertFalse(self.write(self.codes))
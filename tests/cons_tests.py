@@ -4,6 +4,7 @@ Friday, March 30 2012
 """
 
 import re
+import pickle
 import unittest
 from cStringIO import StringIO
 
@@ -52,6 +53,16 @@ class TestCons(unittest.TestCase):
     def testWithMeta_PASS(self):
         c2 = self.c2.withMeta(pseudoMetaData)
         self.assertEqual(c2.meta(), pseudoMetaData)
+    # __slots__
+    def testNoDict_PASS(self):
+        self.assertFalse(hasattr(self.c4, "__dict__"))
+        self.assertFalse(hasattr(self.t3, "__dict__"))
+    def testPickle_PASS(self):
+        c4 = Cons(self.head, pl.creator(0, 1, 2))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            c = pickle.loads(pickle.dumps(c4, protocol))
+            self.assertEqual(c, c4)
+            self.assertEqual(c.meta(), None)
     # (print s)
     def testWriteAsString_PASS(self):
         csio = StringIO()
@@ -0,0 +1,94 @@
+"""constpool_tests.py
+
+Tests for the relocation of the constants of compiled code.
+"""
+
+from fractions import Fraction
+import marshal
+import unittest
+
+from clojure.lang.cljexceptions import RelocationException
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.compiler import Compiler
+from clojure.lang.constpool import relocate, resolve, isRef
+from clojure.lang.fileseq import StringReader
+from clojure.lang.lispreader import read
+import clojure.lang.persistenthashset as persistenthashset
+from clojure.lang.symbol import Symbol
+import clojure.lang.rt as RT
+from clojure.util.byteplay import Code, LOAD_CONST, RETURN_VALUE
+
+
+EOF = object()
+
+
+class TestConstPool(unittest.TestCase):
+    def setUp(self):
+        self.comp = Compiler()
+        self.comp.setNS(Symbol("tests.constpool-scratch"))
+        self.comp.setRelocatable()
+        self.ns = self.comp.getNS()
+
+    def roundTrip(self, source):
+        """Compiles, relocates, marshals, resolves then runs each form of
+        source. Returns the value of the last form."""
+        r = StringReader(source)
+        ret = None
+        while True:
+            form = read(r, False, EOF, False)
+            if form is EOF:
+                return ret
+            code = self.comp.assemble(self.comp.compile(form))
+            code = relocate(code, self.comp.popConstRefs())
+            code = marshal.loads(marshal.dumps(code))
+            ret = self.comp.executeCodeObject(resolve(code, self.comp))
+
+    def testLiterals_PASS(self):
+        v = self.roundTrip("'[1 :a b (c d) {:e #{2}} 3/4]")
+        self.assertEqual(v, RT.vector(1, Keyword("a"), Symbol("b"),
+                                      RT.list(Symbol("c"), Symbol("d")),
+                                      RT.map(Keyword("e"),
+                                             persistenthashset.create(2)),
+                                      Fraction(3, 4)))
+
+    def testDefAndFn_PASS(self):
+        v = self.roundTrip("""
+            (def ^{:doc "adds one"} add-one (fn* [x] (py.bytecode/BINARY_ADD x 1)))
+            (add-one 41)""")
+        self.assertEqual(v, 42)
+        var = getattr(self.ns, "add-one")
+        self.assertEqual(var.meta()[Keyword("doc")], "adds one")
+
+    def testStaticVar_PASS(self):
+        v = self.roundTrip("""
+            (def ^{:static true} twice (fn* [x] (py.bytecode/BINARY_MULTIPLY x 2)))
+            (twice 21)""")
+        self.assertEqual(v, 42)
+        self.assertFalse(getattr(self.ns, "twice").isDynamic())
+
+    def testMultiArityFn_PASS(self):
+        v = self.roundTrip("""
+            (def ^{:static true} over
+              (fn* ([] 0) ([x] x) ([x y & more] more)))
+            [(over) (over 1) (over 1 2 3)]""")
+        self.assertEqual(v, RT.vector(0, 1, (3,)))
+        self.assertEqual(getattr(self.ns, "over").deref()(1, 2), None)
+
+    def testClosure_PASS(self):
+        v = self.roundTrip("""
+            (def adder (fn* [x] (fn* [y] (py.bytecode/BINARY_ADD x y))))
+            ((adder 1) 2)""")
+        self.assertEqual(v, 3)
+
+    def testNoRefsLeft_PASS(self):
+        form = read(StringReader("(fn* [] 'foo)"), False, EOF, False)
+        code = relocate(self.comp.assemble(self.comp.compile(form)),
+                        self.comp.popConstRefs())
+        marshal.dumps(code)
+        resolved = resolve(code, self.comp)
+        self.assertFalse(any(isRef(c) for c in resolved.co_consts))
+
+    def testUnrelocatable_FAIL(self):
+        code = Code([(LOAD_CONST, object()), (RETURN_VALUE, None)],
+                    [], [], False, False, False, "foo", "foo.clj", 0, None)
+        self.assertRaises(RelocationException, relocate, code.to_code())
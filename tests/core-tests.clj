@@ -910,6 +910,19 @@
     (a/assert-equal (filter (fn [x] (zero? (mod x 3))) (range 10)) [0 3 6 9])
     (a/assert-equal (map-indexed (fn [idx x] [idx x]) (range 2)) [[0 0] [1 1]]))
 
+(deftest chunked-vector-seq-tests
+    (let [v (vec (range 100))]
+      (a/assert-true (chunked-seq? (seq v)))
+      (a/assert-equal 32 (count (chunk-first (seq v))))
+      (a/assert-equal (range 1 101) (map inc v))
+      (a/assert-equal (range 0 100 2) (filter even? v))
+      (a/assert-equal 4950 (reduce + v))
+      (a/assert-equal (range 100) (concat (subvec v 0 40) (drop 40 v)))
+      (let [acc (atom [])]
+        (doseq [x v] (swap! acc conj x))
+        (a/assert-equal v @acc))
+      (a/assert-equal [1 2 3] (vec (map inc [0 1 2])))))
+
 (deftest ref-tests
     (a/assert-true (ref nil))
     (let [r (ref nil)]
@@ -957,3 +970,171 @@
 (deftest randnth-tests
     (a/assert-true (< (rand-nth (range 5)) 5))
     (a/assert-true (= (rand-nth '(2 2 2 2)) 2)))
+
+(deftest future-tests
+    (a/assert-equal 3 @(future (+ 1 2)))
+    (a/assert-true (identical? (solo-executor) (solo-executor))))
+
+(defn inlined
+  "Calls with two arguments are compiled to a different form, to tell them
+  apart from calls to the fn."
+  {:inline (fn [x y] (list 'clojure.core/vector :inlined x y))
+   :inline-arities #{2}}
+  ([x] [:called x])
+  ([x y] [:called x y]))
+
+(deftest inline-tests
+    (a/assert-equal [:inlined 1 2] (inlined 1 2))
+    (a/assert-equal [:called 1] (inlined 1))
+    (a/assert-equal [:called 1 2] (apply inlined [1 2]))
+    (a/assert-equal 4 (let [inc dec] (inc 5)))
+    (a/assert-equal [2 3] (map inc [1 2]))
+    (a/assert-equal [true false] [(< 1 2) (< 2 1)])
+    (a/assert-equal -3 (- 3))
+    ; the arities the inline fn does not take are left to the fn
+    (a/assert-equal [:arity :arity]
+                    [(try (zero?) (catch py/TypeError e :arity))
+                     (try (inc 1 2) (catch py/TypeError e :arity))])
+    ; inlined calls ignore the bindings of the Var, the others do not
+    (a/assert-equal [:y :n]
+                    (binding [= (fn [& args] false)]
+                      [(if (= 1 1) :y :n) (if (apply = [1 1]) :y :n)])))
+
+(defn- constant-literal [] [1 "two" {:three [3.0 'four]}])
+(defn- folded [] (+ 1 (* 2 3) (inc 1)))
+(defn- not-folded [x] [(/ 1 0) (+ x 1)])
+
+(deftest constant-tests
+    (a/assert-true (identical? (constant-literal) (constant-literal)))
+    (a/assert-equal [1 "two" {:three [3.0 'four]}] (constant-literal))
+    (a/assert-equal 9 (folded))
+    (a/assert-equal [2 [1]] (let [x 1] [(+ x 1) [x]]))
+    (a/assert-equal :raised
+                    (try (not-folded 1) (catch py/ZeroDivisionError e :raised))))
+
+(defn- overloaded
+  {:static true}
+  ([] :none)
+  ([x] [:one x])
+  ([x y] [:two x y]))
+
+(defn- dynamic-overloaded
+  ([] :none)
+  ([x] [:one x]))
+
+(deftest multi-arity-tests
+    ; only the fns of static Vars are split into overloads
+    (a/assert-not-nil (py/getattr overloaded "_arities" nil))
+    (a/assert-nil (py/getattr dynamic-overloaded "_arities" nil))
+    (a/assert-equal [:none [:one 1]] [(dynamic-overloaded) (dynamic-overloaded 1)])
+    (a/assert-equal :none (overloaded))
+    (a/assert-equal [:one 1] (overloaded 1))
+    (a/assert-equal [:two 1 2] (apply overloaded [1 2]))
+    (a/assert-equal [[:one 1] [:one 2]] (map overloaded [1 2]))
+    (a/assert-equal :raised
+                    (try (apply overloaded [1 2 3])
+                         (catch clojure.lang.cljexceptions/ArityException e
+                           :raised))))
+
+(deftest closure-tests
+    ; captured through a fn that does not use it
+    (a/assert-equal 6 ((((fn [a] (fn [b] (fn [c] (+ a b c)))) 1) 2) 3))
+    ; only the used locals become cells
+    (a/assert-equal ["b"]
+                    (vec (.-co_freevars
+                           (.-func_code ((fn [a b] (fn [] (let [a 5] [a b])))
+                                         1 2)))))
+    (a/assert-equal [0 1 2] (map #(%) (map (fn [i] (fn [] i)) [0 1 2])))
+    (a/assert-equal 120 ((fn [n] ((fn fact [k] (if (zero? k) 1 (* k (fact (dec k)))))
+                                  n))
+                         5)))
+
+(defn- hinted-sum [^int a ^float b] (let [c 2] (+ a b c)))
+(defn- hinted-range? [^int x] [(< 0 x 10) (pos? x) (neg? x)])
+(defn- hinted-vector [^clojure.lang.persistentvector/PersistentVector v]
+  [(nth v 0) (nth v 5 :none) (conj v 4) (assoc v 0 :a)])
+(defn- hinted-map [^clojure.lang.ipersistentmap/IPersistentMap m]
+  [(get m :a) (get m :b :none)])
+(defn- hinted-if [^boolean b] (if b :yes :no))
+
+(deftest type-hint-tests
+    (a/assert-equal 6.5 (hinted-sum 1 3.5))
+    (a/assert-equal [[true true false] [false false true]]
+                    [(hinted-range? 5) (hinted-range? -1)])
+    (a/assert-equal [1 :none [1 2 3 4] [:a 2 3]] (hinted-vector [1 2 3]))
+    (a/assert-equal [1 :none] (hinted-map {:a 1}))
+    ; a hinted nil goes through the core fns
+    (a/assert-equal [nil :none] (hinted-map nil))
+    (a/assert-equal [nil :none [4] {0 :a}] (hinted-vector nil))
+    (a/assert-equal [:yes :no] [(hinted-if true) (hinted-if false)])
+    ; the hint of a local is seen by the fns that capture it
+    (a/assert-equal 5 (((fn [^int a] (fn [b] (+ a b b))) 1) 2)))
+
+(defn- bool-tests-fn [x y]
+  [(if (< x y) :lt :ge)
+   (if (nil? x) :nil :some)
+   (if (instance? py/int x) :int :other)
+   (if (if (< x 0) false (= x y)) :same :different)])
+
+(deftest bool-test-tests
+    (a/assert-equal [:lt :some :int :different] (bool-tests-fn 1 2))
+    (a/assert-equal [:ge :some :int :same] (bool-tests-fn 2 2))
+    (a/assert-equal [:ge :some :other :same] (bool-tests-fn 2.0 2))
+    ; no temporary for the double nil/false check
+    (a/assert-true (not-any? #(.startswith % "p0__")
+                             (.-co_varnames (.-func_code bool-tests-fn)))))
+
+(defn- keyword-lookup [m] [(:a m) (:b m :none)])
+(defn- get-lookup [m k] [(get m k) (get m k :none)])
+
+(deftest lookup-tests
+    (a/assert-equal [1 :none] (keyword-lookup {:a 1}))
+    (a/assert-equal [nil nil] (keyword-lookup nil))
+    (a/assert-equal [nil :none] (keyword-lookup [1 2]))
+    (a/assert-equal [1 :none] (keyword-lookup (py/dict [[:a 1]])))
+    (a/assert-equal [2 2] (get-lookup {:a 2} :a))
+    (a/assert-equal [nil :none] (get-lookup {:a 2} :b))
+    (a/assert-equal [:y :y] (get-lookup [:x :y] 1))
+    (a/assert-equal [nil :none] (get-lookup [:x :y] 2))
+    (a/assert-equal ["b" "b"] (get-lookup "abc" 1))
+    (a/assert-equal [nil :none] (get-lookup nil 1))
+    ; the arguments are evaluated once, in order
+    (let [calls (atom [])
+          f (fn [x] (swap! calls conj x) x)]
+      (a/assert-equal 1 (get (f {:a 1}) (f :a) (f :none)))
+      (a/assert-equal [{:a 1} :a :none] @calls)))
+
+(defn- unpack [v] (let [[a b [c d] & more :as all] v] [a b c d more all]))
+
+(deftest tuple-destructure-tests
+    (a/assert-equal [1 2 3 4 '(5) [1 2 [3 4] 5]] (unpack [1 2 [3 4] 5]))
+    (a/assert-equal [1 nil nil nil nil [1]] (unpack [1]))
+    (a/assert-equal [nil nil nil nil nil nil] (unpack nil))
+    (a/assert-equal ["x" "y" nil nil nil "xy"] (unpack "xy"))
+    (a/assert-equal [1 2 3 4 nil [1 2 [3 4]]] (unpack (py/list [1 2 [3 4]])))
+    (a/assert-equal [2 3 nil nil nil [2 3]] (unpack (map inc [1 2])))
+    (a/assert-equal [1 2] (let [[a b] (py/tuple [1 2 3])] [a b]))
+    ; let* unpacks a tuple into a vector of locals
+    (a/assert-equal [1 2] (let* [[a b] (py/tuple [1 2])] [a b])))
+
+(deftest transient-vector-tests
+    (a/assert-equal [1 :b 3]
+                    (persistent! (-> (transient [1 2])
+                                     (conj! 3)
+                                     (conj! 4)
+                                     (pop!)
+                                     (assoc! 1 :b))))
+    (a/assert-equal [0 1 2 3] (into [0] (range 1 4)))
+    (a/assert-equal {:a 1} (meta (into (with-meta [] {:a 1}) [1])))
+    (a/assert-equal '(3 2 1) (into () [1 2 3]))
+    (a/assert-equal [2 3 4] (mapv inc [1 2 3]))
+    (a/assert-equal [5 7] (mapv + [1 2] [4 5 6]))
+    (a/assert-equal [0 2 4] (filterv even? (range 6))))
+
+(deftest transient-map-tests
+    (a/assert-equal {:a 1 :b 2} (hash-map :a 1 :b 2))
+    (a/assert-equal {:a 0 :b 1} (zipmap [:a :b :c] (range 2)))
+    (a/assert-equal {:a 3 :b 2} (merge {:a 1} nil {:b 2} {:a 3}))
+    (a/assert-equal {:x 1 :y 2} (into {:x 1} [[:y 2]]))
+    (a/assert-equal {:a 2 :b 1 nil 1} (frequencies [:a :b nil :a]))
+    (a/assert-equal {true [0 2] false [1 3]} (group-by even? (range 4))))
@@ -0,0 +1,32 @@
+(ns tests.edn-tests
+    (:require [tests.assertions :as a])
+    (:use [tests.utils :only [deftest]])
+    (:require [clojure.edn :as edn])
+    (:require [StringIO])
+    (:require [os.path] [shutil] [tempfile]))
+
+(deftest read-string-tests
+    (a/assert-equal (edn/read-string "{:a [1 2] b #{nil}}") {:a [1 2] 'b #{nil}})
+    (a/assert-equal (edn/read-string "") nil)
+    (a/assert-equal (edn/read-string {:readers {'twice #(* 2 %)}} "#twice 21")
+                    42)
+    (a/assert-equal (edn/read-string {:default (fn [tag v] [tag v])} "#foo 1")
+                    ['foo 1]))
+
+(deftest read-seq-tests
+    (a/assert-equal (edn/read-seq (StringIO/StringIO "1 [2] ; 3\n:c"))
+                    [1 [2] :c])
+    (a/assert-equal (edn/read-seq (StringIO/StringIO "")) nil))
+
+(deftest indexed-tests
+    (let [dir (tempfile/mkdtemp)
+          path (os.path/join dir "data.edn")]
+      (try
+        (with-open [f (py/open path "w")]
+          (.write f "{:a 1} [2 3] ; c\n:c"))
+        (let [forms (edn/indexed path)]
+          (a/assert-equal (count forms) 3)
+          (a/assert-equal (nth forms 1) [2 3])
+          (a/assert-equal (nth forms 2) :c)
+          (.close forms))
+        (finally (shutil/rmtree dir)))))
@@ -0,0 +1,172 @@
+"""ednreader_tests.py
+
+Tests for the edn reader and the buffered file reader.
+"""
+
+import datetime
+from fractions import Fraction
+import os
+import shutil
+from StringIO import StringIO
+import tempfile
+import unittest
+import uuid
+
+from clojure.lang.cljexceptions import ReaderException
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.ednreader import (EdnReader, EOF, INDEX_SUFFIX,
+                                    IndexedEdnFile, indexForms, readParallel,
+                                    readSeq, readString, splitLines)
+from clojure.lang.fileseq import FileReader
+from clojure.lang.lispreader import read
+import clojure.lang.persistenthashset as persistenthashset
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+
+DATA = """; some data
+{:a [1 2.5 "x y" \\c] b #{nil true} c ("\\"d\\"" 3/4)}
+#_ (ignored) -12 foo/bar
+"""
+
+
+class TestEdnReader(unittest.TestCase):
+    def testData_PASS(self):
+        self.assertEqual(readString(DATA),
+                         RT.map(Keyword("a"), RT.vector(1, 2.5, "x y", "c"),
+                                Symbol("b"),
+                                persistenthashset.create(None, True),
+                                Symbol("c"), RT.list('"d"', Fraction(3, 4))))
+        self.assertEqual(readString(""), None)
+
+    def testNoEval_FAIL(self):
+        for s in ["`a", "~a", "#(a %)", "#'a", "::a", "@a", '#"a"', "{:a}",
+                  "{:a 1 :a 2}", "#{1 1}", "(a"]:
+            self.assertRaises(ReaderException, readString, s)
+
+    def testTags_PASS(self):
+        self.assertEqual(readString('#inst "1985-04-12T23:20:50.52+01:00"'),
+                         datetime.datetime(1985, 4, 12, 22, 20, 50, 520000))
+        u = "f81d4fae-7dec-11d0-a765-00a0c91e6bf6"
+        self.assertEqual(readString('#uuid "{0}"'.format(u)), uuid.UUID(u))
+        self.assertEqual(
+            readString("#my/point [1 2]",
+                       RT.map(Symbol("my", "point"), lambda v: v[0] + v[1])),
+            3)
+        self.assertEqual(readString("#foo 1", None, lambda t, v: (t, v)),
+                         (Symbol("foo"), 1))
+        self.assertRaises(ReaderException, readString, "#foo 1")
+
+    def testReadSeq_PASS(self):
+        forms = list(readSeq(StringIO(DATA)))
+        self.assertEqual(forms[1:], [-12, Symbol("foo", "bar")])
+        d = tempfile.mkdtemp()
+        try:
+            path = os.path.join(d, "data.edn")
+            with open(path, "w") as fl:
+                fl.write("[1 2]\n" * 1000)
+            self.assertEqual(len(list(readSeq(path))), 1000)
+        finally:
+            shutil.rmtree(d)
+
+
+class TestReadParallel(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "data.edn")
+        with open(self.path, "w") as fl:
+            for i in range(200):
+                fl.write('{{:id {0} :tags [:a "b"] :n/k #{{{0}}}}}\n'.format(i))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testSplitLines_PASS(self):
+        with open(self.path) as fl:
+            data = fl.read()
+            chunks = splitLines(fl, 100)
+        self.assertEqual(chunks[0][0], 0)
+        self.assertEqual(chunks[-1][1], len(data))
+        for (start, end), (nextStart, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(end, nextStart)
+            self.assertEqual(data[end - 1], "\n")
+
+    def testInOrder_PASS(self):
+        forms = list(readParallel(self.path, 2, 100))
+        self.assertEqual(forms, list(readSeq(self.path)))
+        self.assertEqual(forms[7][Keyword("id")], 7)
+
+    def testFormAcrossChunks_FAIL(self):
+        with open(self.path, "w") as fl:
+            fl.write("[1\n2]\n")
+        self.assertRaises(ReaderException, list,
+                          readParallel(self.path, 2, 1))
+
+
+class TestIndexedEdnFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "data.edn")
+        with open(self.path, "w") as fl:
+            fl.write(DATA)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testOffsets_PASS(self):
+        self.assertEqual(list(indexForms(StringIO("1 ;c\n [2\n3] #_ 4"))),
+                         [0, 6])
+
+    def testRandomAccess_PASS(self):
+        forms = IndexedEdnFile(self.path)
+        self.assertEqual(len(forms), 3)
+        self.assertEqual(forms[2], Symbol("foo", "bar"))
+        self.assertEqual(forms[-2], -12)
+        self.assertEqual(list(forms), list(readSeq(self.path)))
+        self.assertRaises(IndexError, forms.__getitem__, 3)
+        forms.close()
+
+    def testIndexFile_PASS(self):
+        IndexedEdnFile(self.path).close()
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+        # the index is used as long as the file is unchanged
+        with open(self.path + INDEX_SUFFIX, "rb") as fl:
+            index = fl.read()
+        IndexedEdnFile(self.path).close()
+        with open(self.path + INDEX_SUFFIX, "rb") as fl:
+            self.assertEqual(fl.read(), index)
+
+    def testStaleIndex_PASS(self):
+        IndexedEdnFile(self.path).close()
+        with open(self.path, "a") as fl:
+            fl.write("[:more]\n")
+        forms = IndexedEdnFile(self.path)
+        self.assertEqual(len(forms), 4)
+        self.assertEqual(forms[3], RT.vector(Keyword("more")))
+
+    def testEmpty_PASS(self):
+        open(self.path, "w").close()
+        self.assertEqual(len(IndexedEdnFile(self.path)), 0)
+
+
+class TestFileReader(unittest.TestCase):
+    def testSmallWindow_PASS(self):
+        # tokens, strings and whitespace runs across window boundaries
+        edn = EdnReader()
+        rdr = FileReader(StringIO(DATA), 3)
+        forms = []
+        while True:
+            form = edn.read(rdr, False, EOF)
+            if form is EOF:
+                break
+            forms.append(form)
+        self.assertEqual(forms, [readString(DATA), -12,
+                                 Symbol("foo", "bar")])
+
+    def testLines_PASS(self):
+        rdr = FileReader(StringIO("(a)\n\n(b\n c)\n"), 2)
+        self.assertEqual(read(rdr, False, EOF, False).meta()[Keyword("line")],
+                         1)
+        self.assertEqual(read(rdr, False, EOF, False).meta()[Keyword("line")],
+                         3)
+        self.assertEqual(read(rdr, False, EOF, False), EOF)
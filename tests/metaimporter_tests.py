@@ -0,0 +1,57 @@
+"""metaimporter_tests.py
+
+Tests for the lookup of clj files by the import hook.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from clojure.main import MetaImporter, findClj, listDirectory
+
+
+class TestFindClj(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.touch("foo.clj")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def touch(self, *names):
+        with open(os.path.join(self.dir, *names), "w"):
+            pass
+        # Makes sure the directory's mtime changes, whatever its resolution.
+        st = os.stat(self.dir)
+        os.utime(self.dir, (st.st_atime, st.st_mtime + 10))
+
+    def testFound_PASS(self):
+        self.assertEqual(findClj("foo", [self.dir]),
+                         os.path.join(self.dir, "foo.clj"))
+        self.assertEqual(findClj("bar.foo", [self.dir]),
+                         os.path.join(self.dir, "foo.clj"))
+
+    def testMissing_PASS(self):
+        self.assertEqual(findClj("bar", [self.dir]), None)
+        self.assertEqual(findClj("foo", [os.path.join(self.dir, "nope")]),
+                         None)
+
+    def testShadowedByPackage_PASS(self):
+        os.mkdir(os.path.join(self.dir, "foo"))
+        self.assertNotEqual(findClj("foo", [self.dir]), None)
+        self.touch("foo", "__init__.py")
+        self.assertEqual(findClj("foo", [self.dir]), None)
+
+    def testNewFile_PASS(self):
+        self.assertEqual(findClj("bar", [self.dir]), None)
+        self.touch("bar.clj")
+        self.assertEqual(findClj("bar", [self.dir]),
+                         os.path.join(self.dir, "bar.clj"))
+
+    def testInvalidateCaches_PASS(self):
+        listing = listDirectory(self.dir)
+        self.assertTrue(listDirectory(self.dir) is listing)
+        MetaImporter().invalidate_caches()
+        self.assertFalse(listDirectory(self.dir) is listing)
+        self.assertEqual(listDirectory(self.dir), listing)
@@ -0,0 +1,119 @@
+"""peephole_tests.py
+
+Tests for the peephole optimizer of the code lists of the compiler.
+"""
+
+import types
+import unittest
+
+from clojure.lang.peephole import optimize
+from clojure.util.byteplay import *
+
+
+def run(code, *args):
+    names = ["a", "b"][:len(args)]
+    c = Code(code, [], names, False, False, True, "test", "<test>", 0, None)
+    return types.FunctionType(c.to_code(), {})(*args)
+
+
+class TestPeephole(unittest.TestCase):
+    def testThreadJumps_PASS(self):
+        end = Label("end")
+        middle = Label("middle")
+        code = [(LOAD_FAST, "a"),
+                (POP_JUMP_IF_FALSE, middle),
+                (LOAD_CONST, 1),
+                (RETURN_VALUE, None),
+                (middle, None),
+                (JUMP_ABSOLUTE, end),
+                (end, None),
+                (LOAD_CONST, 2),
+                (RETURN_VALUE, None)]
+        optimized = optimize(code)
+        self.assertEqual(optimized[1][0], POP_JUMP_IF_FALSE)
+        self.assertTrue(optimized[1][1] is end)
+        self.assertFalse((JUMP_ABSOLUTE, end) in optimized)
+
+    def testJumpToConditionalJump_PASS(self):
+        false = Label("false")
+        test = Label("test")
+        code = [(LOAD_FAST, "a"),
+                (JUMP_IF_FALSE_OR_POP, test),
+                (LOAD_FAST, "b"),
+                (test, None),
+                (POP_JUMP_IF_FALSE, false),
+                (LOAD_CONST, 1),
+                (RETURN_VALUE, None),
+                (false, None),
+                (LOAD_CONST, 2),
+                (RETURN_VALUE, None)]
+        optimized = optimize(code)
+        self.assertEqual(optimized[1], (POP_JUMP_IF_FALSE, false))
+        for a, b, result in [(True, True, 1), (True, False, 2),
+                             (False, True, 2)]:
+            self.assertEqual(run(optimized, a, b), result)
+
+    def testJumpToReturn_PASS(self):
+        end = Label("end")
+        other = Label("other")
+        code = [(LOAD_FAST, "a"),
+                (POP_JUMP_IF_FALSE, other),
+                (LOAD_CONST, 1),
+                (JUMP_ABSOLUTE, end),
+                (other, None),
+                (LOAD_CONST, 2),
+                (end, None),
+                (RETURN_VALUE, None)]
+        optimized = optimize(code)
+        self.assertEqual([op for op, arg in optimized].count(RETURN_VALUE), 2)
+        self.assertEqual(run(optimized, True), 1)
+        self.assertEqual(run(optimized, False), 2)
+
+    def testDeadCode_PASS(self):
+        unused = Label("unused")
+        code = [(LOAD_CONST, 1),
+                (RETURN_VALUE, None),
+                (LOAD_CONST, 2),
+                (unused, None),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), code[:2])
+
+    def testJumpToNext_PASS(self):
+        end = Label("end")
+        code = [(LOAD_CONST, 1),
+                (JUMP_FORWARD, end),
+                (end, None),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), [code[0], code[3]])
+
+    def testStoreLoad_PASS(self):
+        code = [(LOAD_FAST, "a"),
+                (STORE_FAST, "x"),
+                (LOAD_FAST, "x"),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), [code[0], code[3]])
+        # x is used again
+        code = [(LOAD_FAST, "a"),
+                (STORE_FAST, "x"),
+                (LOAD_FAST, "x"),
+                (LOAD_FAST, "x"),
+                (BINARY_ADD, None),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), code)
+
+    def testConstantPop_PASS(self):
+        code = [(LOAD_CONST, None),
+                (LOAD_CONST, 1),
+                (POP_TOP, None),
+                (POP_TOP, None),
+                (LOAD_FAST, "a"),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), code[4:])
+
+    def testLinenos_PASS(self):
+        code = [(SetLineno, 1),
+                (SetLineno, 2),
+                (LOAD_FAST, "a"),
+                (SetLineno, 2),
+                (RETURN_VALUE, None)]
+        self.assertEqual(optimize(code), [code[1], code[2], code[4]])
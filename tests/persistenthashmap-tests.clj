@@ -17,4 +17,22 @@
 (deftest entryAt-tests
     (assertions/assert-false (-> testmap
                                  (.without "a")
-                                 (.entryAt "a"))))
\ No newline at end of file
+                                 (.entryAt "a"))))
+
+(deftest transient-tests
+    (let [m (zipmap (range 2000) (range 2000))
+          t (reduce #(dissoc! %1 %2) (transient m) (range 0 2000 2))
+          m2 (persistent! t)]
+      (assertions/assert-equal 2000 (count m))
+      (assertions/assert-equal 1000 (count m2))
+      (assertions/assert-equal 0 (get m 0))
+      (assertions/assert-equal nil (get m2 0))
+      (assertions/assert-equal 1999 (get m2 1999))
+      (assertions/assert-equal (set (range 1 2000 2)) (set (keys m2))))
+    (let [t (assoc! (transient testmap) nil :none -1 :a -2 :b)]
+      ; -1 and -2 have the same hash
+      (assertions/assert-equal 5 (count t))
+      (assertions/assert-equal :b (get t -2))
+      (assertions/assert-equal {"a" 1 "b" 2 nil :none -1 :a}
+                               (persistent! (dissoc! t -2))))
+    (assertions/assert-equal 2 (count testmap)))
@@ -4,12 +4,15 @@ Wednesday, March 28 2012
 """
 
 import re
+import pickle
 import unittest
 from cStringIO import StringIO
 
 import clojure.lang.persistentvector as pv
+from clojure.lang.ichunkedseq import IChunkedSeq
 from clojure.lang.indexableseq import IndexableSeq
 from clojure.lang.cljexceptions import (IndexOutOfBoundsException,
+                                        IllegalAccessError,
                                         IllegalStateException)
 
 uobj = object()
@@ -54,6 +57,13 @@ class TestPersistentVector(unittest.TestCase):
         self.assertRaises(IndexOutOfBoundsException, v.nth, 0)
         self.assertRaises(IndexOutOfBoundsException, v.nth, 99)
         self.assertRaises(IndexOutOfBoundsException, v.nth, -2343)
+    # valAt()
+    def testValAt_PASS(self):
+        self.assertEqual(self.v3.valAt(1), "y")
+        self.assertEqual(self.v3.valAt(3, uobj), uobj)
+        self.assertEqual(self.v3.valAt(-1, uobj), uobj)
+        self.assertEqual(self.v3.valAt(True, uobj), uobj)
+        self.assertEqual(self.v3.valAt("x"), None)
     # assocN()
     def testAssocN_PASS(self):
         for k, v in testAssocNMap_PASS.items():
@@ -92,9 +102,15 @@ class TestPersistentVector(unittest.TestCase):
     # seq()
     def testSeq_PASS(self):
         s = self.v3.seq()
-        self.assertTrue(isinstance(s, IndexableSeq))
+        self.assertTrue(isinstance(s, pv.ChunkedSeq))
         self.assertEqual(len(s), 3)
         self.assertEqual(s.first(), "x")
+    # headTuple()
+    def testHeadTuple_PASS(self):
+        v = pv.vec(range(100))
+        for n in [0, 1, 32, 33, 96, 97, 100, 150]:
+            self.assertEqual(v.headTuple(n), tuple(range(min(n, 100))))
+        self.assertEqual(pv.EMPTY.headTuple(3), ())
     # very basic tests here, do the rest .clj tests
     # better (= v q)
     def test__eq___PASS(self):
@@ -127,6 +143,140 @@ class TestPersistentVector(unittest.TestCase):
         self.assertTrue(re.match(regex, self.printV.__repr__()))
 
 
+class TestFromSequence(unittest.TestCase):
+    # the tree has the same shape as one built by cons
+    def testShape_PASS(self):
+        for n in [0, 1, 32, 33, 1056, 1057, 1089, 33 * 1024 + 33]:
+            v = pv.fromSequence(range(n))
+            c = pv.EMPTY
+            for i in range(n):
+                c = c.cons(i)
+            self.assertEqual(len(v), n)
+            self.assertEqual(v._shift, c._shift)
+            self.assertEqual(list(v), range(n))
+            self.assertEqual([v.nth(i) for i in range(n)], range(n))
+    def testIterable_PASS(self):
+        self.assertEqual(list(pv.fromSequence(iter(range(100)))), range(100))
+        self.assertEqual(pv.fromSequence(()), pv.EMPTY)
+    def testChanges_PASS(self):
+        v = pv.fromSequence(range(1100))
+        self.assertEqual(v.cons(1100)[1100], 1100)
+        self.assertEqual(v.assocN(0, "a")[0], "a")
+        for n in range(1100, 0, -1):
+            self.assertEqual(v.peek(), n - 1)
+            v = v.pop()
+        self.assertEqual(v, pv.EMPTY)
+
+
+class TestChunkedSeq(unittest.TestCase):
+    # one chunk per leaf, the last one being the tail
+    def testChunks_PASS(self):
+        s = pv.vec(range(100)).seq()
+        chunks = []
+        while s is not None:
+            self.assertTrue(isinstance(s, IChunkedSeq))
+            chunks.append(list(s.chunkedFirst()))
+            s = s.chunkedNext()
+        self.assertEqual(chunks, [range(0, 32), range(32, 64),
+                                  range(64, 96), range(96, 100)])
+        self.assertEqual(len(pv.vec(range(10)).seq().chunkedMore()), 0)
+    def testFirstNext_PASS(self):
+        for n in [1, 31, 32, 33, 1100]:
+            s = pv.vec(range(n)).seq()
+            items = []
+            while s is not None:
+                self.assertEqual(len(s), n - len(items))
+                items.append(s.first())
+                s = s.next()
+            self.assertEqual(items, range(n))
+    def testIter_PASS(self):
+        s = pv.vec(range(1100)).seq()
+        self.assertEqual(list(s), range(1100))
+        self.assertEqual(list(s.next().next()), range(2, 1100))
+        self.assertEqual(list(s.chunkedNext().next()), range(33, 1100))
+        # the tail is not padded after pop
+        v = pv.vec(range(40)).pop().pop()
+        self.assertEqual(list(v.seq()), range(38))
+    def testChunk_PASS(self):
+        c = pv.vec(range(40)).seq().next().chunkedFirst()
+        self.assertEqual(len(c), 31)
+        self.assertEqual(c[0], 1)
+        self.assertEqual(c.nth(30), 31)
+        self.assertEqual(c.nth(31, "nf"), "nf")
+        self.assertEqual(len(c.dropFirst()), 30)
+        self.assertEqual(c.reduce(lambda x, y: x + y, 0), sum(range(1, 32)))
+    def testEquality_PASS(self):
+        self.assertEqual(pv.vec(range(100)), pv.vec(range(100)))
+        v = pv.vec(range(100))
+        self.assertEqual(v.seq(), IndexableSeq(v, 0))
+        self.assertEqual(v.seq().hasheq(), IndexableSeq(v, 0).hasheq())
+
+
+class TestSlots(unittest.TestCase):
+    # the nodes and entries have no __dict__
+    def testNoDict_PASS(self):
+        v = pv.vec(range(100))
+        self.assertFalse(hasattr(v._root, "__dict__"))
+        self.assertFalse(hasattr(v._root._array[0], "__dict__"))
+        self.assertFalse(hasattr(v.seq(), "__dict__"))
+    def testPickle_PASS(self):
+        v = pv.vec(range(1100))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertEqual(pickle.loads(pickle.dumps(v, protocol)), v)
+
+
+class TestTransientVector(unittest.TestCase):
+    # conj!, persistent!
+    def testConj_PASS(self):
+        t = pv.EMPTY.asTransient()
+        for i in range(2000):
+            self.assertTrue(t.conj(i) is t)
+        self.assertEqual(len(t), 2000)
+        v = t.persistent()
+        self.assertEqual(list(v), range(2000))
+        self.assertEqual(v.cons(2000)[2000], 2000)
+        self.assertEqual(len(pv.EMPTY), 0)
+    # the vector it was made from is left alone
+    def testShared_PASS(self):
+        v = pv.vec(range(100))
+        t = v.asTransient()
+        t.assocN(0, "a").assocN(99, "b").conj("c").pop().pop()
+        self.assertEqual(list(v), range(100))
+        self.assertEqual(list(t.persistent()), ["a"] + range(1, 99))
+    # assoc!
+    def testAssocN_PASS(self):
+        t = pv.vec(range(1100)).asTransient()
+        for i in range(0, 1100, 7):
+            t.assocN(i, -i)
+        t.assoc(1100, "end")
+        self.assertEqual(t.valAt(1100), "end")
+        self.assertEqual(t.valAt(1101, "nf"), "nf")
+        self.assertEqual(t.nth(7), -7)
+        self.assertEqual(list(t.persistent()),
+                         [-i if not i % 7 else i for i in range(1100)]
+                         + ["end"])
+    def testAssocN_FAIL(self):
+        t = pv.EMPTY.asTransient()
+        self.assertRaises(IndexOutOfBoundsException, t.assocN, 1, None)
+    # pop!
+    def testPop_PASS(self):
+        t = pv.vec(range(1100)).asTransient()
+        for n in range(1100, 0, -1):
+            self.assertEqual(len(t), n)
+            self.assertEqual(t.nth(n - 1), n - 1)
+            t.pop()
+        self.assertEqual(t.persistent(), pv.EMPTY)
+    def testPop_FAIL(self):
+        t = pv.EMPTY.asTransient()
+        self.assertRaises(IllegalStateException, t.pop)
+    # no use after persistent!
+    def testPersistent_FAIL(self):
+        t = pv.EMPTY.asTransient()
+        t.persistent()
+        self.assertRaises(IllegalAccessError, t.conj, 1)
+        self.assertRaises(IllegalAccessError, t.persistent)
+
+
 testCreationMap_PASS = {
     # vec
     pv.vec([]): pv.EMPTY,
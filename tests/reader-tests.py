@@ -22,6 +22,7 @@ from clojure.lang.persistenthashmap import PersistentHashMap
 from clojure.lang.persistenthashset import PersistentHashSet
 from clojure.lang.fileseq import StringReader
 from clojure.lang.cljexceptions import ReaderException
+from clojure.lang.cljkeyword import LINE_KEY
 from clojure.lang.pytypes import *
 
 
@@ -135,6 +136,20 @@ class TestReader(unittest.TestCase):
         for s in miscellaneous_FAIL:
             r = StringReader(s)
             self.assertRaises(ReaderException, read, r, False, EOF, False)
+    # whitespace, comments and line numbers
+    def testLineNumbers_PASS(self):
+        r = StringReader("; comment\n,, foo\n\n(bar ; baz\n\n  (qux))")
+        self.assertEqual(read(r, False, EOF, False), Symbol("foo"))
+        lst = read(r, False, EOF, False)
+        self.assertEqual(lst.meta()[LINE_KEY], 4)
+        self.assertEqual(lst.next().first().meta()[LINE_KEY], 6)
+        self.assertEqual(read(r, False, EOF, False), EOF)
+    def testReadMatchThenBack_PASS(self):
+        r = StringReader("foo bar")
+        self.assertEqual(read(r, False, EOF, False), Symbol("foo"))
+        self.assertEqual(r.read(), " ")
+        r.back()
+        self.assertEqual(read(r, False, EOF, False), Symbol("bar"))
             
 
 # ======================================================================